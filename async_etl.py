@@ -0,0 +1,376 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional
+
+from main import Character, DataProcessor, PeopleCrawl, Swapi
+from state import SyncReport
+
+DONE = None
+
+
+class AsyncSwapi:
+    """
+    Асинхронный доступ к SWAPI поверх пула соединений Swapi.
+    Запросы выполняются в потоках Fetcher, event loop не блокируется.
+    ...
+    Атрибуты
+    --------
+    swapi : class
+        Экземпляр класса Swapi
+    Методы
+    ------
+    get_json():
+        Получает JSON по адресу.
+    iter_pages():
+        Получает страницы коллекции SWAPI по порядку.
+    get_planet():
+        Получает информацию об одной планете.
+    """
+
+    def __init__(self, swapi: Swapi) -> None:
+        self.swapi = swapi
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.swapi.fetcher.executor, func, *args
+        )
+
+    async def get_json(self, url: str) -> dict:
+        return await self._run(self.swapi._get_json, url)
+
+    async def get_planet(self, homeworld_url: str) -> dict:
+        return await self._run(self.swapi.get_planet, homeworld_url)
+
+    async def iter_pages(self, resource: str) -> AsyncIterator[dict]:
+        """
+        Получает страницы коллекции SWAPI по порядку, остальные страницы
+        после первой запрашиваются параллельно по полю count.
+        ---------
+        resource : str
+            имя коллекции, например "people/"
+        ---------------------
+        AsyncIterator[dict]
+        """
+        data = await self.get_json(f"{self.swapi.base_url}{resource}")
+        yield data
+
+        page_urls = self.swapi._page_urls(data)
+        if page_urls is not None:
+            pages = [
+                asyncio.ensure_future(self.get_json(page_url))
+                for page_url in page_urls
+            ]
+            try:
+                for page in pages:
+                    yield await page
+            finally:
+                for page in pages:
+                    page.cancel()
+            return
+
+        url = data['next']
+        while url:
+            data = await self.get_json(url)
+            yield data
+            url = data['next']
+
+
+class AsyncOdoo:
+    """
+    Асинхронный доступ к Odoo. Вызовы выполняются в потоках,
+    по одному на соединение пула Odoo.
+    ...
+    Атрибуты
+    --------
+    odoo_repo : class
+        Экземпляр класса Odoo
+    Методы
+    ------
+    run():
+        Выполняет блокирующую функцию в потоке Odoo.
+    """
+
+    def __init__(self, odoo_repo) -> None:
+        self.odoo_repo = odoo_repo
+        pool_size = getattr(odoo_repo.models, 'size', 1)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def create_planets(self, planets: dict) -> dict:
+        return await self.run(self.odoo_repo.create_planets, planets)
+
+    async def create_partners(self, partners: dict) -> dict:
+        return await self.run(self.odoo_repo.create_partners, partners)
+
+    async def write(self, model: str, odoo_id: int, values: dict) -> bool:
+        return await self.run(self.odoo_repo.write, model, odoo_id, values)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+class AsyncDataProcessor(DataProcessor):
+    """
+    Асинхронный вариант DataProcessor.
+    Этапы связаны ограниченными очередями: планеты создаются,
+    пока загружаются страницы персонажей, а контакты - пока
+    загружаются изображения. Решения о создании, обновлении и пропуске
+    принимаются теми же методами, что и в DataProcessor, поэтому
+    состояние Odoo после синхронизации совпадает.
+    ...
+    Атрибуты
+    --------
+    queue_size : int
+        размер очередей между этапами
+    image_workers : int
+        количество одновременно загружаемых изображений
+    batch_linger : float
+        сколько ждать следующую планету, прежде чем отправить
+        неполный пакет, в секундах
+    ------
+    process_data():
+        заполнение БД требуемыми данными
+    process_data_async():
+        то же, внутри работающего event loop
+    """
+
+    def __init__(self, swapi, odoo_repo, images=None, state=None,
+                 refresh_images=False, queue_size=100, image_workers=None,
+                 batch_linger=0.05):
+        super().__init__(
+            swapi, odoo_repo, images,
+            state=state, refresh_images=refresh_images,
+        )
+        self.queue_size = queue_size
+        self.image_workers = image_workers or swapi.fetcher.max_workers
+        self.batch_linger = batch_linger
+        self.aswapi = AsyncSwapi(swapi)
+        self.aodoo = AsyncOdoo(odoo_repo)
+
+    def process_data(self) -> SyncReport:
+        """
+        заполнение БД требуемыми данными
+        ---------
+        Возвращаемое значение
+        ---------------------
+        SyncReport
+        """
+        return asyncio.run(self.process_data_async())
+
+    async def process_data_async(self) -> SyncReport:
+        self.images.open()
+        self._planet_ids: dict = {}
+        planet_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        character_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        image_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        upload_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        stages = [
+            self._crawl(planet_queue, character_queue),
+            self._planets(planet_queue),
+            self._characters(character_queue, image_queue),
+            self._uploads(upload_queue),
+        ] + [
+            self._images(image_queue, upload_queue)
+            for _ in range(self.image_workers)
+        ]
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+        try:
+            done, pending = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_EXCEPTION
+            )
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.images.close()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.aodoo.close()
+
+        if self.state is not None:
+            self.state.commit()
+        logging.info(f'Sync finished: {self.report.summary()}')
+        return self.report
+
+    async def _ensure_index(self, index, model: str, swapi_id: str) -> None:
+        """
+        Загружает индекс имен в потоке Odoo, если он понадобится
+        для записи, отсутствующей в состоянии синхронизации.
+        """
+        if index.loaded or self._state_record(model, swapi_id) is not None:
+            return
+        await self.aodoo.run(index.load)
+
+    def _planet_future(self, planet_id: str) -> asyncio.Future:
+        future = self._planet_ids.get(planet_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._planet_ids[planet_id] = future
+        return future
+
+    async def _crawl(self, planet_queue, character_queue) -> None:
+        crawl = PeopleCrawl()
+        planet_fetches = []
+
+        async def fetch_planet(homeworld_url):
+            planet_id = homeworld_url.split('/')[-2]
+            try:
+                planet_data = await self.aswapi.get_planet(homeworld_url)
+            except Exception as error:
+                self._planet_future(planet_id).set_exception(error)
+                raise
+            await planet_queue.put((planet_id, planet_data))
+
+        async for data in self.aswapi.iter_pages('people/'):
+            for raw_character in data['results']:
+                if crawl.add(raw_character):
+                    self._planet_future(crawl.characters[-1].homeworld_id)
+                    planet_fetches.append(asyncio.ensure_future(
+                        fetch_planet(raw_character['homeworld'])
+                    ))
+                await character_queue.put(crawl.characters[-1])
+
+        await character_queue.put(DONE)
+        try:
+            await asyncio.gather(*planet_fetches)
+        finally:
+            for fetch in planet_fetches:
+                fetch.cancel()
+        await planet_queue.put(DONE)
+
+    async def _flush_planets(self, new_planets: dict) -> None:
+        created = await self.aodoo.run(self.flush_planets, new_planets)
+        for planet_id in new_planets:
+            self._planet_future(planet_id).set_result(created.get(planet_id))
+
+    async def _planets(self, planet_queue) -> None:
+        new_planets: dict = {}
+        while True:
+            try:
+                item = await asyncio.wait_for(
+                    planet_queue.get(),
+                    self.batch_linger if new_planets else None,
+                )
+            except asyncio.TimeoutError:
+                await self._flush_planets(new_planets)
+                new_planets = {}
+                continue
+            if item is DONE:
+                break
+
+            planet_id, planet_data = item
+            await self._ensure_index(
+                self.planet_index, 'res.planet', planet_id
+            )
+            action, odoo_id, values, record = self.plan_planet(
+                planet_id, planet_data
+            )
+            if action == 'create':
+                new_planets[planet_id] = values
+                if len(new_planets) >= self.odoo_repo.chunk_size:
+                    await self._flush_planets(new_planets)
+                    new_planets = {}
+                continue
+            if action == 'update':
+                await self.aodoo.run(
+                    self._update, 'res.planet', planet_id, record, values
+                )
+            self._planet_future(planet_id).set_result(odoo_id)
+
+        if new_planets:
+            await self._flush_planets(new_planets)
+
+    async def _characters(self, character_queue, image_queue) -> None:
+        while True:
+            character: Optional[Character] = await character_queue.get()
+            if character is DONE:
+                break
+            new_planet_id = await self._planet_future(character.homeworld_id)
+            await self._ensure_index(
+                self.partner_index, 'res.partner', character.swapi_id
+            )
+            item = self.plan_character(character, new_planet_id)
+            if item is None:
+                continue
+            _, _, record = item
+            if record is None or self.refresh_images:
+                await image_queue.put(item)
+            else:
+                await self.aodoo.run(
+                    self._update, 'res.partner', character.swapi_id, record,
+                    self.odoo_repo.character_values(
+                        character.name, None, new_planet_id
+                    )
+                )
+
+        for _ in range(self.image_workers):
+            await image_queue.put(DONE)
+
+    async def _images(self, image_queue, upload_queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await image_queue.get()
+            if item is DONE:
+                break
+            character = item[0]
+            try:
+                encoded = await loop.run_in_executor(
+                    self.swapi.fetcher.executor,
+                    self.images.encode, character.swapi_id
+                )
+            except Exception as error:
+                await upload_queue.put((item, None, error))
+            else:
+                await upload_queue.put((item, encoded, None))
+        await upload_queue.put(DONE)
+
+    async def _uploads(self, upload_queue) -> None:
+        partners: dict = {}
+        names: dict = {}
+        batch_bytes = 0
+        running_workers = self.image_workers
+
+        while running_workers:
+            entry = await upload_queue.get()
+            if entry is DONE:
+                running_workers -= 1
+                continue
+            (character, new_planet_id, record), encoded, error = entry
+            if encoded is not None:
+                self.images.budget.release(len(encoded))
+            if error is not None:
+                logging.error(
+                    f"не удалось создать: "
+                    f"Entity: Character, "
+                    f"Name: {character.name}, "
+                    f"Remote ID: {character.swapi_id}, {error}"
+                )
+                self.report.add('res.partner', 'failed')
+                continue
+            values = self.odoo_repo.character_values(
+                character.name, None, new_planet_id, encoded_image=encoded
+            )
+            if record is not None:
+                await self.aodoo.run(
+                    self._refresh_character, character.swapi_id, record,
+                    values
+                )
+                continue
+
+            partners[character.swapi_id] = values
+            names[character.swapi_id] = character.name
+            batch_bytes += len(encoded or '')
+            if (len(partners) >= self.odoo_repo.chunk_size
+                    or batch_bytes >= self.images.max_in_flight_bytes):
+                await self.aodoo.run(self.flush_characters, partners, names)
+                partners, names, batch_bytes = {}, {}, 0
+
+        if partners:
+            await self.aodoo.run(self.flush_characters, partners, names)
@@ -0,0 +1,88 @@
+"""
+Проверка политики транспорта на заглушке SWAPI с внедренными ошибками.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_faults --error-rate 0.1 --throttle-rate 0.05
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.swapi_stub import SwapiStub
+from fetcher import Fetcher
+from main import Swapi
+from transport import TransportPolicy
+
+
+def crawl(stub: SwapiStub, policy: TransportPolicy):
+    """
+    Обходит people/ с планетами и загружает изображения.
+    Возвращает (успех, ошибка, время в секундах).
+    """
+    with Fetcher(policy=policy) as fetcher:
+        swapi = Swapi(
+            fetcher=fetcher,
+            base_url=stub.base_url,
+            picture_url=stub.picture_url,
+        )
+        started = time.perf_counter()
+        try:
+            result = swapi.crawl_people()
+            images = swapi.prefetch_images(
+                [character.swapi_id for character in result.characters]
+            )
+            missing = sum(
+                future.result() is None for future in images.values()
+            )
+            error = f'{missing} images missing' if missing else None
+        except Exception as exc:
+            error = f'{type(exc).__name__}: {exc}'
+        return error is None, error, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--error-rate', type=float, default=0.1)
+    parser.add_argument('--throttle-rate', type=float, default=0.05)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--retries', type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    with SwapiStub(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+    ) as stub:
+        for name, policy in (
+                ('no retries', TransportPolicy(retries=0)),
+                ('retries', TransportPolicy(
+                    retries=args.retries, backoff=0.05,
+                    failure_threshold=50,
+                )),
+                ('retries + 50 req/s', TransportPolicy(
+                    retries=args.retries, backoff=0.05, rate=50,
+                    failure_threshold=50,
+                )),
+        ):
+            faults = stub.fault_count
+            ok, error, elapsed = crawl(stub, policy)
+            faults = stub.fault_count - faults
+            print(f'{name:>20}: {"ok" if ok else "FAILED":>6} '
+                  f'{elapsed:6.2f}s, injected faults {faults}'
+                  f'{"" if ok else ", " + error}')
+
+        stub.down = True
+        policy = TransportPolicy(
+            retries=2, backoff=0.05, failure_threshold=3, reset_timeout=60
+        )
+        ok, error, elapsed = crawl(stub, policy)
+        started = time.perf_counter()
+        ok, error, _ = crawl(stub, policy)
+        print(f'{"backend down":>20}: first run {elapsed:.2f}s, '
+              f'next run failed fast in {time.perf_counter() - started:.3f}s '
+              f'({error})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Сравнение последовательной и параллельной загрузки данных SWAPI.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_fetch --workers 8 --latency 0.05
+"""
+import argparse
+import time
+
+from benchmarks.swapi_stub import SwapiStub
+from fetcher import Fetcher
+from main import Swapi
+
+
+def run(stub: SwapiStub, workers: int, per_host_limit: int) -> float:
+    """
+    Загружает персонажей, планеты и изображения, возвращает время в секундах.
+    """
+    with Fetcher(
+            max_workers=workers, per_host_limit=per_host_limit
+    ) as fetcher:
+        swapi = Swapi(
+            fetcher=fetcher,
+            base_url=stub.base_url,
+            picture_url=stub.picture_url,
+        )
+        started = time.perf_counter()
+        crawl = swapi.crawl_people()
+        images = swapi.prefetch_images(
+            [character.swapi_id for character in crawl.characters]
+        )
+        for future in images.values():
+            future.result()
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--characters', type=int, default=82)
+    args = parser.parse_args()
+
+    with SwapiStub(
+        characters_count=args.characters, latency=args.latency
+    ) as stub:
+        sequential = run(stub, workers=1, per_host_limit=1)
+        requests_made = stub.request_count
+        concurrent = run(stub, workers=args.workers,
+                         per_host_limit=args.workers)
+
+    print(f'requests per run: {requests_made}')
+    print(f'sequential: {sequential:.2f}s '
+          f'({requests_made / sequential:.1f} req/s)')
+    print(f'concurrent ({args.workers} workers): {concurrent:.2f}s '
+          f'({requests_made / concurrent:.1f} req/s)')
+    print(f'speedup: {sequential / concurrent:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Микробенчмарк сопоставления персонажей и планет в DataProcessor.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_join --sizes 1000 10000 100000
+"""
+import argparse
+import logging
+import time
+
+from main import DataProcessor, PeopleCrawl
+
+BASE_URL = 'https://swapi.dev/api/'
+
+
+def synthetic_people(characters_count: int, planets_count: int) -> list:
+    return [
+        {
+            'name': f'Character {character_id}',
+            'url': f'{BASE_URL}people/{character_id}/',
+            'homeworld': (
+                f'{BASE_URL}planets/{character_id % planets_count + 1}/'
+            ),
+        }
+        for character_id in range(1, characters_count + 1)
+    ]
+
+
+class EmptyOdoo:
+    """
+    Odoo без записей: индексы имен загружаются пустыми.
+    """
+
+    def search_read_all(self, model, fields, domain=None, page_size=1000):
+        return iter(())
+
+
+def legacy_join(planets: dict, characters: list) -> list:
+    """
+    Сопоставление в прежнем виде: полный проход по персонажам
+    для каждой планеты с повторным разбором адресов.
+    """
+    pending = []
+    for planet_id in planets:
+        for character in characters:
+            character_id = character['url'].split('/')[-2]
+            character_planet_id = character['homeworld'].split('/')[-2]
+            if character_planet_id == planet_id:
+                pending.append((character_id, character))
+    return pending
+
+
+def measure(characters_count: int, planets_count: int, legacy: bool):
+    people = synthetic_people(characters_count, planets_count)
+    planet_ids = {
+        str(planet_id): planet_id for planet_id in range(1, planets_count + 1)
+    }
+    processor = DataProcessor(swapi=None, odoo_repo=EmptyOdoo())
+
+    started = time.perf_counter()
+    crawl = PeopleCrawl()
+    for data in people:
+        crawl.add(data)
+    pending = processor.plan_characters(crawl, planet_ids)
+    elapsed = time.perf_counter() - started
+    assert len(pending) == characters_count
+
+    legacy_elapsed = None
+    if legacy:
+        started = time.perf_counter()
+        legacy_join(planet_ids, people)
+        legacy_elapsed = time.perf_counter() - started
+    return elapsed, legacy_elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1000, 10000, 100000]
+    )
+    parser.add_argument(
+        '--characters-per-planet', type=int, default=10,
+        help='среднее число персонажей на планету'
+    )
+    parser.add_argument(
+        '--legacy-limit', type=int, default=10000,
+        help='максимальный размер, для которого замеряется прежний алгоритм'
+    )
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f'{"characters":>10} {"join, s":>10} {"ns/char":>10} '
+          f'{"legacy, s":>10}')
+    for size in args.sizes:
+        planets_count = max(1, size // args.characters_per_planet)
+        elapsed, legacy_elapsed = measure(
+            size, planets_count, legacy=size <= args.legacy_limit
+        )
+        legacy = f'{legacy_elapsed:10.3f}' if legacy_elapsed else f'{"-":>10}'
+        print(f'{size:>10} {elapsed:10.3f} {elapsed / size * 1e9:10.0f} '
+              f'{legacy}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Сравнение транспортов Odoo RPC на локальном поддельном сервере:
+XML-RPC и JSON-RPC, один поток и пул соединений.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_odoo --calls 400 --threads 4
+"""
+import argparse
+import base64
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_odoo import FakeOdooDatabase, FakeOdooServer
+from odoo_client import PROTOCOLS, OdooPool
+
+
+def run(url: str, protocol: str, threads: int, calls: int,
+        image: str) -> float:
+    """
+    Выполняет calls вызовов create с изображением и search_read,
+    возвращает количество вызовов в секунду.
+    """
+    pool = OdooPool(url, protocol=protocol, size=threads)
+    uid = pool.authenticate('odoo16', 'admin', 'admin')
+
+    def call(number):
+        if number % 2:
+            return pool.execute_kw(
+                'odoo16', uid, 'admin', 'res.partner', 'search_read',
+                [[('name', '=', f'bench {number - 1}')]],
+                {'fields': ['name'], 'limit': 1},
+            )
+        return pool.execute_kw(
+            'odoo16', uid, 'admin', 'res.partner', 'create',
+            [{'name': f'bench {number}', 'image_1920': image}],
+        )
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(call, range(calls)))
+        return calls / (time.perf_counter() - started)
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--image-size', type=int, default=16 * 1024)
+    args = parser.parse_args()
+
+    image = base64.b64encode(os.urandom(args.image_size)).decode('ascii')
+    database = FakeOdooDatabase(latency=args.latency)
+    with FakeOdooServer(database) as server:
+        for protocol in PROTOCOLS:
+            for threads in sorted({1, args.threads}):
+                rate = run(server.url, protocol, threads, args.calls, image)
+                print(f'{protocol:8} threads={threads}: {rate:.1f} calls/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Масштабирование ShardedDataProcessor по количеству процессов.
+Записанные ответы SWAPI и поддельный сервер Odoo работают в отдельных
+процессах, чтобы не делить GIL с синхронизацией.
+
+Запуск из корня репозитория (фикстуры: python -m benchmarks.fixtures):
+    python -m benchmarks.bench_shards --workers 1 2 4 --scale 10
+"""
+import argparse
+import functools
+import logging
+import multiprocessing
+import time
+
+from benchmarks import fixtures
+from benchmarks.fake_odoo import FakeOdooDatabase, FakeOdooServer
+from fetcher import Fetcher
+from images import ImagePipeline
+from main import DataProcessor, Odoo, Swapi
+from sharded import ShardedDataProcessor
+
+
+def serve_fixtures(path: str, scale: int, latency: float, pipe) -> None:
+    server = fixtures.FixtureServer(fixtures.load(path), scale, latency)
+    with server:
+        pipe.send((server.base_url, server.picture_url))
+        pipe.recv()
+        pipe.send(server.request_count)
+
+
+def serve_odoo(latency: float, pipe) -> None:
+    database = FakeOdooDatabase(latency=latency, store_images=False)
+    with FakeOdooServer(database) as server:
+        pipe.send(server.url)
+        pipe.recv()
+        pipe.send(database.calls)
+
+
+class Service:
+    """
+    Сервер в отдельном процессе: адрес доступен после запуска,
+    счетчик запросов возвращается при остановке.
+    """
+
+    def __init__(self, target, *args) -> None:
+        context = multiprocessing.get_context('spawn')
+        self._pipe, child_pipe = context.Pipe()
+        self._process = context.Process(
+            target=target, args=args + (child_pipe,), daemon=True
+        )
+
+    def __enter__(self):
+        self._process.start()
+        return self._pipe.recv()
+
+    def stop(self) -> int:
+        self._pipe.send('stop')
+        count = self._pipe.recv()
+        self._process.join()
+        return count
+
+    def __exit__(self, *exc_info) -> None:
+        if self._process.is_alive():
+            self._process.terminate()
+
+
+def make_processor(swapi_urls: tuple, odoo_url: str) -> DataProcessor:
+    logging.disable(logging.CRITICAL)
+    base_url, picture_url = swapi_urls
+    fetcher = Fetcher(max_workers=8, per_host_limit=8)
+    swapi = Swapi(fetcher=fetcher, base_url=base_url, picture_url=picture_url)
+    return DataProcessor(swapi, Odoo(url=odoo_url), ImagePipeline(swapi))
+
+
+def run(args, workers: int) -> tuple:
+    fixture_service = Service(
+        serve_fixtures, args.fixtures, args.scale, args.latency
+    )
+    odoo_service = Service(serve_odoo, args.rpc_latency)
+    with fixture_service as swapi_urls, odoo_service as odoo_url:
+        processor = ShardedDataProcessor(
+            functools.partial(make_processor, swapi_urls, odoo_url), workers
+        )
+        started = time.perf_counter()
+        report = processor.process_data()
+        elapsed = time.perf_counter() - started
+        fixture_service.stop()
+        rpc = odoo_service.stop()
+    return elapsed, rpc, report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixtures', default='benchmarks/fixtures')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--rpc-latency', type=float, default=0.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    baseline = None
+    for workers in args.workers:
+        elapsed, rpc, report = run(args, workers)
+        baseline = baseline or elapsed
+        print(f'workers={workers}: {elapsed:.2f}s, rpc {rpc}, '
+              f'speedup {baseline / elapsed:.2f}x, {report.summary()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Офлайн-бенчмарк DataProcessor.process_data: записанные ответы SWAPI
+с задержкой и Odoo в памяти процесса. Каждый масштаб запускается
+в отдельном процессе, чтобы пиковая RSS не накапливалась.
+
+Запуск из корня репозитория (фикстуры: python -m benchmarks.fixtures):
+    python -m benchmarks.bench_sync --scales 1 10 100 --latency 0.01
+"""
+import argparse
+import logging
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks import fixtures
+from benchmarks.fake_odoo import FakeOdooDatabase
+from fetcher import Fetcher
+from images import ImagePipeline
+from main import DataProcessor, Odoo, Swapi
+
+
+def peak_rss() -> int:
+    """
+    Пиковая RSS процесса в байтах.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def run(path: str, scale: int, latency: float, rpc_latency: float,
+        workers: int, async_mode: bool) -> dict:
+    """
+    Выполняет одну синхронизацию и возвращает время, количество
+    вызовов RPC и пиковую RSS.
+    """
+    logging.disable(logging.CRITICAL)
+    recorded = fixtures.load(path)
+    database = FakeOdooDatabase(latency=rpc_latency, store_images=False)
+    with fixtures.FixtureServer(recorded, scale, latency) as server, \
+            Fetcher(max_workers=workers, per_host_limit=workers) as fetcher:
+        swapi = Swapi(
+            fetcher=fetcher,
+            base_url=server.base_url,
+            picture_url=server.picture_url,
+        )
+        odoo_repo = Odoo(models=database)
+        processor_class = DataProcessor
+        if async_mode:
+            from async_etl import AsyncDataProcessor
+            processor_class = AsyncDataProcessor
+        processor = processor_class(swapi, odoo_repo, ImagePipeline(swapi))
+
+        rss_before = peak_rss()
+        started = time.perf_counter()
+        report = processor.process_data()
+        elapsed = time.perf_counter() - started
+
+    return {
+        'characters': len(server.characters),
+        'seconds': elapsed,
+        'rpc': database.calls,
+        'http': server.request_count,
+        'rss_before': rss_before,
+        'peak_rss': peak_rss(),
+        'failed': sum(
+            count for (_, action), count in report.counts.items()
+            if action == 'failed'
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixtures', default='benchmarks/fixtures')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--rpc-latency', type=float, default=0.0)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--async', dest='async_mode', action='store_true')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'scale':>5} {'characters':>10} {'wall s':>8} {'rpc':>6} "
+          f"{'http':>7} {'failed':>6} {'rss MB':>8} {'peak MB':>8}")
+    for scale in args.scales:
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            result = executor.submit(
+                run, args.fixtures, scale, args.latency, args.rpc_latency,
+                args.workers, args.async_mode,
+            ).result()
+        print(f"{scale:>5} {result['characters']:>10} "
+              f"{result['seconds']:>8.2f} {result['rpc']:>6} "
+              f"{result['http']:>7} {result['failed']:>6} "
+              f"{result['rss_before'] / 2 ** 20:>8.1f} "
+              f"{result['peak_rss'] / 2 ** 20:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
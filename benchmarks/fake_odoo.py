@@ -0,0 +1,231 @@
+import json
+import threading
+import time
+import xmlrpc.client
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+
+from benchmarks.swapi_stub import QuietHTTPServer
+from exceptions import OdooRpcError
+from state import IMAGE_FIELD
+
+UID = 2
+
+
+class FakeOdooDatabase:
+    """
+    Хранилище в памяти с API execute_kw для моделей res.planet
+    и res.partner.
+    ...
+    Атрибуты
+    --------
+    latency : float
+        задержка каждого вызова в секундах
+    calls : int
+        количество вызовов execute_kw
+    fail_names : set
+        имена записей, создание которых завершается ошибкой
+    store_images : bool
+        хранить изображения; иначе хранится только их длина, чтобы
+        память хранилища не искажала замеры RSS
+    """
+
+    def __init__(self, latency: float = 0.0, fail_names=(),
+                 store_images: bool = True) -> None:
+        self.latency = latency
+        self.fail_names = set(fail_names)
+        self.store_images = store_images
+        self.calls = 0
+        self.tables = {'res.planet': {}, 'res.partner': {}}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _match(record: dict, domain: list) -> bool:
+        for field_name, operator, value in domain:
+            if operator != '=':
+                raise ValueError(f'Unsupported operator {operator}')
+            if record.get(field_name) != value:
+                return False
+        return True
+
+    def _stored(self, values: dict) -> dict:
+        values = dict(values)
+        if not self.store_images and values.get(IMAGE_FIELD):
+            values[IMAGE_FIELD] = len(values[IMAGE_FIELD])
+        return values
+
+    def authenticate(self, db, username, password, user_agent_env=None):
+        return UID
+
+    def execute_kw(
+            self, db, uid, password, model, method, args, kwargs=None
+    ):
+        if self.latency:
+            time.sleep(self.latency)
+        kwargs = kwargs or {}
+        with self._lock:
+            self.calls += 1
+            table = self.tables[model]
+            if method == 'create':
+                values = args[0]
+                records = [values] if isinstance(values, dict) else values
+                for record in records:
+                    if record.get('name') in self.fail_names:
+                        raise OdooRpcError(
+                            f"Cannot create {record['name']}"
+                        )
+                ids = []
+                for record in records:
+                    self._next_id += 1
+                    table[self._next_id] = self._stored(record)
+                    ids.append(self._next_id)
+                return ids[0] if isinstance(values, dict) else ids
+            if method in ('search', 'search_read'):
+                ids = [
+                    record_id for record_id, record in table.items()
+                    if self._match(record, args[0] if args else [])
+                ]
+                offset = kwargs.get('offset', 0)
+                limit = kwargs.get('limit') or len(ids)
+                ids = ids[offset:offset + limit]
+                if method == 'search':
+                    return ids
+                fields = kwargs.get('fields') or []
+                return [
+                    dict(
+                        {name: table[record_id].get(name) for name in fields},
+                        id=record_id,
+                    )
+                    for record_id in ids
+                ]
+            if method == 'write':
+                for record_id in args[0]:
+                    table[record_id].update(self._stored(args[1]))
+                return True
+        raise ValueError(f'Unsupported method {method}')
+
+    def close(self) -> None:
+        pass
+
+
+class FakeOdooServer:
+    """
+    Локальный сервер Odoo RPC поверх FakeOdooDatabase:
+    /xmlrpc/2/common, /xmlrpc/2/object и /jsonrpc.
+    ...
+    Атрибуты
+    --------
+    faults : list
+        HTTP-статусы, которыми сервер ответит на следующие запросы
+        вместо их выполнения
+    retry_after : float
+        значение Retry-After для ответов 429, в секундах
+    """
+
+    def __init__(self, database: FakeOdooDatabase = None) -> None:
+        self.database = database or FakeOdooDatabase()
+        self.requests = 0
+        self.faults: list = []
+        self.retry_after = 0.0
+        self._lock = threading.Lock()
+        self._server = QuietHTTPServer(('127.0.0.1', 0), self._handler())
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def dispatch(self, service: str, method: str, args):
+        if service == 'common' and method == 'authenticate':
+            return self.database.authenticate(*args)
+        if service == 'object' and method == 'execute_kw':
+            return self.database.execute_kw(*args)
+        raise ValueError(f'Unsupported call {service}.{method}')
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _reply(self, body: bytes, content_type: str) -> None:
+                self.send_response(HTTPStatus.OK)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _fault(self, status: int) -> None:
+                body = b'Injected fault'
+                self.send_response(status)
+                if status == HTTPStatus.TOO_MANY_REQUESTS:
+                    self.send_header('Retry-After', str(server.retry_after))
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                payload = self.rfile.read(
+                    int(self.headers.get('Content-Length', 0))
+                )
+                with server._lock:
+                    server.requests += 1
+                    fault = server.faults.pop(0) if server.faults else None
+                if fault is not None:
+                    self._fault(fault)
+                    return
+                if self.path == '/jsonrpc':
+                    request = json.loads(payload)
+                    params = request['params']
+                    try:
+                        result = {'result': server.dispatch(
+                            params['service'], params['method'],
+                            params['args'],
+                        )}
+                    except Exception as error:
+                        result = {'error': {
+                            'code': 200, 'message': 'Odoo Server Error',
+                            'data': {'message': str(error)},
+                        }}
+                    result.update(jsonrpc='2.0', id=request.get('id'))
+                    self._reply(json.dumps(result).encode(),
+                                'application/json')
+                    return
+
+                args, method = xmlrpc.client.loads(payload)
+                service = self.path.rstrip('/').split('/')[-1]
+                try:
+                    response = xmlrpc.client.dumps(
+                        (server.dispatch(service, method, args),),
+                        methodresponse=True, allow_none=True,
+                    )
+                except Exception as error:
+                    response = xmlrpc.client.dumps(
+                        xmlrpc.client.Fault(1, str(error)),
+                        methodresponse=True,
+                    )
+                self._reply(response.encode(), 'text/xml')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FakeOdooServer':
+        threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeOdooServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
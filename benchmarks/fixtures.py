@@ -0,0 +1,178 @@
+"""
+Запись и воспроизведение ответов SWAPI для офлайн-бенчмарков.
+
+Запись с живого SWAPI (нужна сеть):
+    python -m benchmarks.fixtures --output benchmarks/fixtures
+Запись с локальной заглушки, если сети нет:
+    python -m benchmarks.fixtures --output benchmarks/fixtures --source stub
+"""
+import argparse
+import json
+import os
+from http import HTTPStatus
+from typing import NamedTuple
+
+from benchmarks.swapi_stub import SwapiStub
+from main import Swapi
+
+
+class Fixtures(NamedTuple):
+    """
+    Записанные ответы SWAPI: сырые персонажи, планеты и изображения.
+    """
+    people: list
+    planets: dict
+    images: dict
+
+
+def record(swapi: Swapi, path: str) -> Fixtures:
+    """
+    Сохраняет персонажей, их родные планеты и изображения в каталог path.
+    ---------
+    swapi : Swapi
+        источник данных
+    path : str
+        каталог фикстур
+    ---------------------
+    Fixtures
+    """
+    people = [
+        character
+        for page in swapi.iter_pages('people/')
+        for character in page['results']
+    ]
+    homeworld_urls = sorted({character['homeworld'] for character in people})
+    planets = dict(zip(
+        (url.split('/')[-2] for url in homeworld_urls),
+        swapi.fetcher.map(swapi.get_planet, homeworld_urls),
+    ))
+
+    def download(character):
+        character_id = character['url'].split('/')[-2]
+        response = swapi.fetcher.get(swapi.picture_url.format(character_id))
+        if response.status_code != HTTPStatus.OK:
+            return character_id, None
+        return character_id, response.content
+
+    images = {
+        character_id: image
+        for character_id, image in swapi.fetcher.map(download, people)
+        if image is not None
+    }
+
+    os.makedirs(os.path.join(path, 'images'), exist_ok=True)
+    with open(os.path.join(path, 'people.json'), 'w', encoding='utf-8') as f:
+        json.dump(people, f, ensure_ascii=False, indent=1)
+    with open(os.path.join(path, 'planets.json'), 'w', encoding='utf-8') as f:
+        json.dump(planets, f, ensure_ascii=False, indent=1)
+    for character_id, image in images.items():
+        with open(os.path.join(path, 'images', f'{character_id}.jpg'),
+                  'wb') as f:
+            f.write(image)
+    return Fixtures(people, planets, images)
+
+
+def load(path: str) -> Fixtures:
+    with open(os.path.join(path, 'people.json'), encoding='utf-8') as f:
+        people = json.load(f)
+    with open(os.path.join(path, 'planets.json'), encoding='utf-8') as f:
+        planets = json.load(f)
+    images = {}
+    images_dir = os.path.join(path, 'images')
+    for name in os.listdir(images_dir):
+        with open(os.path.join(images_dir, name), 'rb') as f:
+            images[os.path.splitext(name)[0]] = f.read()
+    return Fixtures(people, planets, images)
+
+
+class FixtureServer(SwapiStub):
+    """
+    Локальный сервер, отдающий записанные ответы SWAPI с задержкой.
+    При scale > 1 персонажи размножаются с новыми id и именами,
+    родные планеты и изображения берутся из записи.
+    ...
+    Атрибуты
+    --------
+    fixtures : Fixtures
+        записанные ответы
+    scale : int
+        во сколько раз увеличить количество персонажей
+    latency : float
+        задержка перед каждым ответом в секундах
+    """
+
+    def __init__(self, fixtures: Fixtures, scale: int = 1,
+                 latency: float = 0.01) -> None:
+        super().__init__(characters_count=0, planets_count=0, latency=latency)
+        self.fixtures = fixtures
+        self.scale = scale
+        self.planets = {
+            planet_id: {
+                key: value for key, value in planet.items() if key != 'url'
+            }
+            for planet_id, planet in fixtures.planets.items()
+        }
+        source_ids = [
+            int(character['url'].split('/')[-2])
+            for character in fixtures.people
+        ]
+        step = max(source_ids, default=0)
+        self.characters = [
+            {
+                'id': copy * step + source_id,
+                'source_id': str(source_id),
+                'homeworld_id': character['homeworld'].split('/')[-2],
+                'name': (
+                    character['name'] if not copy
+                    else f"{character['name']} #{copy + 1}"
+                ),
+                'data': character,
+            }
+            for copy in range(scale)
+            for source_id, character in zip(source_ids, fixtures.people)
+        ]
+        self._source_ids = {
+            str(character['id']): character['source_id']
+            for character in self.characters
+        }
+
+    def _character_payload(self, character: dict) -> dict:
+        return dict(
+            character['data'],
+            name=character['name'],
+            url=f"{self.base_url}people/{character['id']}/",
+            homeworld=f"{self.base_url}planets/{character['homeworld_id']}/",
+        )
+
+    def route(self, path: str, query: dict):
+        parts = [part for part in path.split('/') if part]
+        if parts[:2] == ['img', 'characters'] and len(parts) == 3:
+            source_id = self._source_ids.get(parts[2].split('.')[0])
+            image = self.fixtures.images.get(source_id)
+            if image is not None:
+                return HTTPStatus.OK, 'image/jpeg', image
+            return HTTPStatus.NOT_FOUND, 'text/html', b'Not found'
+        return super().route(path, query)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', default='benchmarks/fixtures')
+    parser.add_argument('--source', choices=('live', 'stub'), default='live')
+    args = parser.parse_args()
+
+    if args.source == 'live':
+        fixtures = record(Swapi(), args.output)
+    else:
+        with SwapiStub(latency=0) as stub:
+            fixtures = record(
+                Swapi(base_url=stub.base_url, picture_url=stub.picture_url),
+                args.output,
+            )
+    print(f'recorded {len(fixtures.people)} characters, '
+          f'{len(fixtures.planets)} planets, {len(fixtures.images)} images '
+          f'to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PAGE_SIZE = 10
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер, не печатающий обрывы соединений клиентом.
+    """
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def build_dataset(characters_count: int = 82, planets_count: int = 60):
+    """
+    Строит синтетический набор персонажей и планет в формате SWAPI.
+    ---------
+    Возвращаемое значение
+    ---------------------
+    tuple
+        (список персонажей, словарь id планеты -> данные планеты)
+    """
+    planets = {
+        str(planet_id): {
+            'name': f'Planet {planet_id}',
+            'diameter': str(1000 * planet_id),
+            'population': 'unknown' if planet_id % 7 == 0 else str(planet_id),
+            'rotation_period': str(20 + planet_id % 10),
+            'orbital_period': str(300 + planet_id),
+        }
+        for planet_id in range(1, planets_count + 1)
+    }
+    characters = [
+        {
+            'name': f'Character {character_id}',
+            'id': character_id,
+            'homeworld_id': (character_id * 7) % planets_count + 1,
+        }
+        for character_id in range(1, characters_count + 1)
+    ]
+    return characters, planets
+
+
+class SwapiStub:
+    """
+    Локальный HTTP-сервер, имитирующий SWAPI и сервер изображений.
+    ...
+    Атрибуты
+    --------
+    latency : float
+        задержка перед каждым ответом в секундах
+    base_url : str
+        адрес API для передачи в Swapi
+    picture_url : str
+        шаблон адреса изображений для передачи в Swapi
+    include_count : bool
+        отдавать ли поле count на страницах коллекций
+    error_rate : float
+        доля запросов, на которые отвечает 503
+    throttle_rate : float
+        доля запросов, на которые отвечает 429 с Retry-After
+    retry_after : float
+        значение Retry-After для ответов 429, в секундах
+    down : bool
+        отвечать 503 на все запросы
+    request_count : int
+        количество обработанных запросов
+    """
+
+    def __init__(
+            self,
+            characters_count: int = 82,
+            planets_count: int = 60,
+            latency: float = 0.05,
+            image_size: int = 16 * 1024,
+            include_count: bool = True,
+            error_rate: float = 0.0,
+            throttle_rate: float = 0.0,
+            retry_after: float = 0.1,
+            seed: int = 0,
+    ) -> None:
+        self.characters, self.planets = build_dataset(
+            characters_count, planets_count
+        )
+        self.latency = latency
+        self.include_count = include_count
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.down = False
+        self.fault_count = 0
+        self._random = random.Random(seed)
+        self.image = b'\xff\xd8' + b'\x00' * (image_size - 4) + b'\xff\xd9'
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = QuietHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/api/'
+
+    @property
+    def picture_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/img/characters/{{}}.jpg'
+
+    def _character_payload(self, character: dict) -> dict:
+        return {
+            'name': character['name'],
+            'url': f"{self.base_url}people/{character['id']}/",
+            'homeworld': (
+                f"{self.base_url}planets/{character['homeworld_id']}/"
+            ),
+        }
+
+    def _planet_payload(self, planet_id: str) -> dict:
+        return dict(
+            self.planets[planet_id], url=f'{self.base_url}planets/{planet_id}/'
+        )
+
+    def _page(self, resource: str, items: list, page: int):
+        start = (page - 1) * PAGE_SIZE
+        results = items[start:start + PAGE_SIZE]
+        if page < 1 or not results:
+            return None
+        has_next = start + PAGE_SIZE < len(items)
+        data = {
+            'next': (
+                f'{self.base_url}{resource}/?page={page + 1}'
+                if has_next else None
+            ),
+            'previous': (
+                f'{self.base_url}{resource}/?page={page - 1}'
+                if page > 1 else None
+            ),
+            'results': results,
+        }
+        if self.include_count:
+            data['count'] = len(items)
+        return data
+
+    def route(self, path: str, query: dict):
+        """
+        Возвращает (статус, content-type, тело) для запрошенного пути.
+        """
+        parts = [part for part in path.split('/') if part]
+        page_number = int(query.get('page', ['1'])[0])
+        if parts[:2] == ['api', 'people'] and len(parts) == 2:
+            page = self._page('people', self.characters, page_number)
+            if page is not None:
+                page['results'] = [
+                    self._character_payload(c) for c in page['results']
+                ]
+                return HTTPStatus.OK, 'application/json', json.dumps(
+                    page).encode()
+        elif parts[:2] == ['api', 'planets'] and len(parts) == 2:
+            page = self._page('planets', list(self.planets), page_number)
+            if page is not None:
+                page['results'] = [
+                    self._planet_payload(p) for p in page['results']
+                ]
+                return HTTPStatus.OK, 'application/json', json.dumps(
+                    page).encode()
+        elif parts[:2] == ['api', 'planets'] and len(parts) == 3:
+            planet = self.planets.get(parts[2])
+            if planet is not None:
+                return HTTPStatus.OK, 'application/json', json.dumps(
+                    planet).encode()
+        elif parts[:2] == ['img', 'characters'] and len(parts) == 3:
+            return HTTPStatus.OK, 'image/jpeg', self.image
+        body = b'{"detail": "Not found"}'
+        return HTTPStatus.NOT_FOUND, 'application/json', body
+
+    def fault(self):
+        """
+        Возвращает (статус, заголовки) внедряемой ошибки или None.
+        """
+        with self._lock:
+            roll = self._random.random()
+            if self.down or roll < self.error_rate:
+                self.fault_count += 1
+                return HTTPStatus.SERVICE_UNAVAILABLE, {}
+            if roll < self.error_rate + self.throttle_rate:
+                self.fault_count += 1
+                return HTTPStatus.TOO_MANY_REQUESTS, {
+                    'Retry-After': str(self.retry_after)
+                }
+        return None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                fault = stub.fault()
+                if fault is not None:
+                    status, headers = fault
+                    body = b'{"detail": "Injected fault"}'
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                url = urlsplit(self.path)
+                status, content_type, body = stub.route(
+                    url.path, parse_qs(url.query)
+                )
+                etag = '"{}"'.format(hashlib.md5(body).hexdigest())
+                if (status == HTTPStatus.OK
+                        and self.headers.get('If-None-Match') == etag):
+                    status, body = HTTPStatus.NOT_MODIFIED, b''
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'SwapiStub':
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'SwapiStub':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,235 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHEABLE_STATUSES = frozenset({HTTPStatus.OK, HTTPStatus.NOT_FOUND})
+
+
+@dataclass
+class CacheEntry:
+    """
+    Метаданные сохраненного ответа.
+    """
+    url: str
+    key: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: Optional[str]
+    stored_at: float
+    size: int
+    status: int = HTTPStatus.OK
+
+
+class HttpCache:
+    """
+    Постоянный дисковый кэш HTTP-ответов, ключ - адрес запроса.
+    Кроме успешных ответов сохраняются ответы 404, чтобы отсутствующие
+    изображения не запрашивались повторно до истечения ttl.
+    ...
+    Атрибуты
+    --------
+    path : str
+        каталог кэша
+    ttl : float
+        время жизни записи в секундах, None - без ограничения
+    max_size : int
+        максимальный суммарный размер тел ответов в байтах
+    offline : bool
+        режим "только кэш": запросы в сеть не выполняются
+    Методы
+    ------
+    lookup():
+        Возвращает запись кэша для адреса.
+    is_fresh():
+        Проверяет, не истек ли срок жизни записи.
+    conditional_headers():
+        Заголовки для условного запроса к серверу.
+    store():
+        Сохраняет ответ в кэш.
+    refresh():
+        Продлевает запись после ответа 304 Not Modified.
+    to_response():
+        Собирает requests.Response из записи кэша.
+    """
+
+    def __init__(
+            self,
+            path: str = '.swapi_cache',
+            ttl: Optional[float] = 24 * 60 * 60,
+            max_size: int = 256 * 1024 * 1024,
+            offline: bool = False,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(path, 'index.sqlite'), check_same_thread=False
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'url TEXT PRIMARY KEY, key TEXT NOT NULL, etag TEXT, '
+            'last_modified TEXT, content_type TEXT, '
+            'stored_at REAL NOT NULL, accessed_at REAL NOT NULL, '
+            'size INTEGER NOT NULL, status INTEGER NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE INDEX IF NOT EXISTS entries_accessed_at '
+            'ON entries (accessed_at)'
+        )
+        self._evict()
+        self._db.commit()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.path, key)
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """
+        Возвращает запись кэша для адреса и отмечает обращение к ней.
+        ---------
+        Возвращаемое значение
+        ---------------------
+        CacheEntry или None
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT url, key, etag, last_modified, content_type, '
+                'stored_at, size, status FROM entries WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(*row)
+            if not os.path.exists(self._body_path(entry.key)):
+                self._delete(entry.url, entry.key)
+                self._db.commit()
+                return None
+            self._db.execute(
+                'UPDATE entries SET accessed_at = ? WHERE url = ?',
+                (time.time(), url)
+            )
+            self._db.commit()
+            return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.ttl is None or time.time() - entry.stored_at < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> dict:
+        headers: dict = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """
+        Сохраняет тело и заголовки валидации ответа.
+        ---------
+        url : str
+            адрес запроса
+        response : requests.Response
+            ответ сервера со статусом из CACHEABLE_STATUSES
+        ---------------------
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        body = response.content
+        tmp_path = f'{self._body_path(key)}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(body)
+        os.replace(tmp_path, self._body_path(key))
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries (url, key, etag, '
+                'last_modified, content_type, stored_at, accessed_at, size, '
+                'status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    url, key, response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    response.headers.get('Content-Type'),
+                    now, now, len(body), response.status_code,
+                )
+            )
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, url: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'UPDATE entries SET stored_at = ?, accessed_at = ? '
+                'WHERE url = ?', (now, now, url)
+            )
+            self._db.commit()
+
+    def to_response(
+            self, entry: CacheEntry
+    ) -> Optional[requests.Response]:
+        """
+        Собирает requests.Response из записи кэша.
+        Если тело записи уже вытеснено другим потоком, возвращает None.
+        ---------
+        Возвращаемое значение
+        ---------------------
+        requests.Response или None
+        """
+        try:
+            with open(self._body_path(entry.key), 'rb') as file:
+                body = file.read()
+        except FileNotFoundError:
+            return None
+        response = requests.Response()
+        response.status_code = entry.status
+        response.reason = HTTPStatus(entry.status).phrase
+        response.url = entry.url
+        response._content = body
+        response._content_consumed = True
+        response.headers = CaseInsensitiveDict({
+            'Content-Type': entry.content_type or 'application/octet-stream',
+            'Content-Length': str(len(body)),
+        })
+        if entry.content_type and 'json' in entry.content_type:
+            response.encoding = 'utf-8'
+        response.from_cache = True
+        return response
+
+    def _delete(self, url: str, key: str) -> None:
+        self._db.execute('DELETE FROM entries WHERE url = ?', (url,))
+        try:
+            os.remove(self._body_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        total = self._db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries'
+        ).fetchone()[0]
+        if total <= self.max_size:
+            return
+        rows = self._db.execute(
+            'SELECT url, key, size FROM entries ORDER BY accessed_at'
+        ).fetchall()
+        for url, key, size in rows:
+            if total <= self.max_size:
+                break
+            self._delete(url, key)
+            total -= size
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -4,3 +4,51 @@ class ExceptionStatusError(Exception):
     def __init__(self, message):
         self.message = message
 
+
+class CacheMissError(ConnectionError):
+    """Класс исключения при отсутствии ответа в кэше в режиме offline."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class CircuitOpenError(ConnectionError):
+    """Класс исключения при обращении к недоступному бэкенду."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class RetryableError(Exception):
+    """
+    Класс исключения для ответов, которые стоит повторить.
+    Ответ 429 или ответ с Retry-After считается ограничением частоты
+    (throttled), а не отказом бэкенда.
+    """
+
+    def __init__(self, message, retry_after=None, response=None,
+                 status=None):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+        self.response = response
+        self.status = status
+        self.throttled = status == 429 or retry_after is not None
+
+
+class OdooRpcError(Exception):
+    """Класс исключения при ошибке, которую вернул сервер Odoo."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class PipelineClosedError(Exception):
+    """Класс исключения при загрузке изображения после остановки конвейера."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
@@ -0,0 +1,175 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import CACHEABLE_STATUSES, HttpCache
+from exceptions import CacheMissError, RetryableError
+from transport import RETRYABLE_STATUSES, TransportPolicy, parse_retry_after
+
+
+class Fetcher:
+    """
+    Слой загрузки данных поверх пула HTTP-соединений.
+    ...
+    Атрибуты
+    --------
+    max_workers : int
+        количество потоков для параллельных запросов
+    per_host_limit : int
+        максимум одновременных запросов к одному хосту
+    host_limits : dict
+        индивидуальные ограничения для отдельных хостов
+    policy : TransportPolicy
+        таймауты, повторы, лимит частоты и предохранитель
+    cache : HttpCache
+        необязательный дисковый кэш ответов
+    Методы
+    ------
+    get():
+        Выполняет GET-запрос через общую сессию.
+    map():
+        Применяет функцию к элементам параллельно, сохраняя порядок.
+    close():
+        Закрывает пул потоков и соединения.
+    """
+
+    def __init__(
+            self,
+            max_workers: int = 8,
+            per_host_limit: int = 4,
+            host_limits: Optional[Dict[str, int]] = None,
+            policy: Optional[TransportPolicy] = None,
+            cache: Optional[HttpCache] = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.host_limits = host_limits or {}
+        self.policy = policy or TransportPolicy()
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                limit = self.host_limits.get(host, self.per_host_limit)
+                semaphore = threading.BoundedSemaphore(limit)
+                self._semaphores[host] = semaphore
+        return semaphore
+
+    def _attempt(
+            self, url: str, headers: Optional[dict], stream: bool
+    ) -> requests.Response:
+        with self._host_semaphore(url):
+            response = self.session.get(
+                url, headers=headers, timeout=self.policy.timeout,
+                stream=stream,
+            )
+        if response.status_code in RETRYABLE_STATUSES:
+            raise RetryableError(
+                f'{url} {response.status_code} {response.reason}',
+                retry_after=parse_retry_after(
+                    response.headers.get('Retry-After')
+                ),
+                response=response,
+                status=response.status_code,
+            )
+        return response
+
+    def _request(
+            self, url: str, headers: Optional[dict] = None,
+            stream: bool = False,
+    ) -> requests.Response:
+        """
+        Выполняет GET-запрос по политике транспорта. Если повторы
+        исчерпаны, возвращается последний ответ с ошибкой.
+        """
+        try:
+            return self.policy.call(
+                urlsplit(url).netloc,
+                lambda: self._attempt(url, headers, stream),
+                retry_on=(requests.ConnectionError, requests.Timeout),
+            )
+        except RetryableError as error:
+            return error.response
+
+    def get(self, url: str, stream: bool = False) -> requests.Response:
+        """
+        Выполняет GET-запрос с учетом ограничения на хост.
+        Если подключен кэш, свежие ответы отдаются из него, а устаревшие
+        перепроверяются условным запросом; у ответов, подтвержденных
+        сервером (304), выставлен атрибут revalidated.
+        ---------
+        url : str
+            адрес запроса
+        stream : bool
+            не читать тело ответа сразу (без кэша)
+        ---------------------
+        requests.Response
+        """
+        if self.cache is None:
+            return self._request(url, stream=stream)
+
+        entry = self.cache.lookup(url)
+        if entry is not None and (
+                self.cache.offline or self.cache.is_fresh(entry)
+        ):
+            response = self.cache.to_response(entry)
+            if response is not None:
+                return response
+            entry = None
+        if self.cache.offline:
+            raise CacheMissError(f'No cached response for {url}')
+
+        response = self._request(
+            url, headers=self.cache.conditional_headers(entry)
+        )
+        if response.status_code == HTTPStatus.NOT_MODIFIED and entry:
+            self.cache.refresh(url)
+            cached = self.cache.to_response(entry)
+            if cached is not None:
+                cached.revalidated = True
+                return cached
+            response = self._request(url)
+        if response.status_code in CACHEABLE_STATUSES:
+            self.cache.store(url, response)
+        return response
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        """
+        Параллельно применяет func к каждому элементу items.
+        ---------
+        Возвращаемое значение
+        ---------------------
+        list
+            результаты в порядке исходных элементов
+        """
+        return list(self.executor.map(func, items))
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self) -> 'Fetcher':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,245 @@
+import base64
+import io
+import logging
+import queue
+import threading
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from exceptions import PipelineClosedError
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_IMAGE_SIZE = 64 * 1024
+CHUNK_SIZE = 48 * 1024
+
+
+class Base64Encoder:
+    """
+    Потоковый кодировщик base64: принимает байты частями и возвращает
+    закодированный текст без накопления исходных данных.
+    """
+
+    def __init__(self) -> None:
+        self._tail = b''
+
+    def feed(self, chunk: bytes) -> str:
+        data = self._tail + chunk
+        cut = len(data) - len(data) % 3
+        self._tail = data[cut:]
+        return base64.b64encode(data[:cut]).decode('ascii')
+
+    def finish(self) -> str:
+        tail, self._tail = self._tail, b''
+        return base64.b64encode(tail).decode('ascii')
+
+
+class ByteBudget:
+    """
+    Ограничение суммарного размера данных, находящихся в обработке.
+    Запрос, превышающий весь бюджет, пропускается, когда бюджет свободен.
+    После close() ожидающие и новые запросы завершаются
+    PipelineClosedError.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int) -> None:
+        with self._condition:
+            while (not self.closed and self.in_flight
+                   and self.in_flight + size > self.max_bytes):
+                self._condition.wait()
+            if self.closed:
+                raise PipelineClosedError('Image pipeline is closed')
+            self.in_flight += size
+
+    def release(self, size: int) -> None:
+        self.adjust(-size)
+
+    def adjust(self, delta: int) -> None:
+        with self._condition:
+            self.in_flight += delta
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class ImageResult(NamedTuple):
+    """
+    Изображение персонажа в base64 или ошибка его загрузки.
+    """
+    character_id: str
+    encoded: Optional[str]
+    error: Optional[Exception]
+
+
+class ImagePipeline:
+    """
+    Загрузка изображений персонажей с ограничением памяти.
+    Изображения скачиваются потоково, кодируются в base64 по частям
+    и передаются потребителю через очередь. Суммарный размер
+    изображений между загрузкой и выдачей потребителю не превышает
+    max_in_flight_bytes.
+    ...
+    Атрибуты
+    --------
+    swapi : class
+        Экземпляр класса Swapi
+    max_in_flight_bytes : int
+        бюджет памяти на загружаемые изображения
+    max_dimension : int
+        максимальная сторона изображения, None - без изменения размера
+    quality : int
+        качество JPEG при пережатии
+    Методы
+    ------
+    run():
+        Загружает изображения и выдает их по мере готовности.
+    encode():
+        Загружает и кодирует изображение одного персонажа.
+    open():
+        Готовит бюджет памяти к новому запуску.
+    close():
+        Останавливает загрузки, ожидающие бюджета.
+    """
+
+    def __init__(
+            self,
+            swapi,
+            max_in_flight_bytes: int = 16 * 1024 * 1024,
+            max_dimension: Optional[int] = None,
+            quality: int = 85,
+    ) -> None:
+        self.swapi = swapi
+        self.max_in_flight_bytes = max_in_flight_bytes
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.budget = ByteBudget(max_in_flight_bytes)
+
+        if max_dimension and Image is None:
+            logging.warning(
+                'Pillow is not installed, images are uploaded without resizing'
+            )
+
+    def open(self) -> ByteBudget:
+        """
+        Заменяет закрытый бюджет новым. Загрузки прерванного запуска
+        продолжают работать со своим, уже закрытым бюджетом.
+        """
+        if self.budget.closed:
+            self.budget = ByteBudget(self.max_in_flight_bytes)
+        return self.budget
+
+    def close(self) -> None:
+        self.budget.close()
+
+    def _downscale(self, data: bytes) -> bytes:
+        with Image.open(io.BytesIO(data)) as image:
+            if max(image.size) <= self.max_dimension:
+                return data
+            image.thumbnail((self.max_dimension, self.max_dimension))
+            output = io.BytesIO()
+            image.convert('RGB').save(
+                output, format='JPEG', quality=self.quality, optimize=True
+            )
+            return output.getvalue()
+
+    def encode(self, character_id: str) -> Optional[str]:
+        """
+        Загружает изображение персонажа и кодирует его в base64.
+        Память под изображение резервируется в бюджете и освобождается
+        потребителем после выдачи результата.
+        ---------
+        Возвращаемое значение
+        ---------------------
+        str или None
+        """
+        budget = self.budget
+        if budget.closed:
+            raise PipelineClosedError('Image pipeline is closed')
+        response = self.swapi.request_image(character_id, stream=True)
+        if response is None:
+            return None
+
+        with response:
+            size = int(
+                response.headers.get('Content-Length') or DEFAULT_IMAGE_SIZE
+            )
+            reserved = (size + 2) // 3 * 4
+            budget.acquire(reserved)
+            try:
+                if self.max_dimension and Image is not None:
+                    data = self._downscale(response.content)
+                    encoded = base64.b64encode(data).decode('ascii')
+                else:
+                    encoder = Base64Encoder()
+                    parts = [
+                        encoder.feed(chunk)
+                        for chunk in response.iter_content(CHUNK_SIZE)
+                    ]
+                    parts.append(encoder.finish())
+                    encoded = ''.join(parts)
+            except BaseException:
+                budget.release(reserved)
+                raise
+
+        budget.adjust(len(encoded) - reserved)
+        return encoded
+
+    def run(self, character_ids: Iterable[str]) -> Iterator[ImageResult]:
+        """
+        Загружает изображения параллельно и выдает их по мере готовности.
+        Одновременно в пул отправлено не больше двух загрузок на поток.
+        Память под изображение освобождается, когда потребитель
+        запрашивает следующий результат. Если потребитель прекращает
+        чтение, бюджет закрывается и оставшиеся загрузки завершаются.
+        ---------
+        character_ids : Iterable[str]
+            идентификаторы персонажей в SWAPI
+        ---------------------
+        Iterator[ImageResult]
+        """
+        budget = self.open()
+        results: queue.Queue = queue.Queue()
+        pending_ids = iter(character_ids)
+        window = 2 * self.swapi.fetcher.max_workers
+        in_flight = 0
+
+        def task(character_id):
+            try:
+                results.put(
+                    ImageResult(character_id, self.encode(character_id), None)
+                )
+            except Exception as error:
+                results.put(ImageResult(character_id, None, error))
+
+        def submit_next() -> None:
+            nonlocal in_flight
+            character_id = next(pending_ids, None)
+            if character_id is not None:
+                self.swapi.fetcher.executor.submit(task, character_id)
+                in_flight += 1
+
+        try:
+            for _ in range(window):
+                submit_next()
+            while in_flight:
+                result = results.get()
+                in_flight -= 1
+                try:
+                    yield result
+                finally:
+                    if result.encoded is not None:
+                        budget.release(len(result.encoded))
+                submit_next()
+        finally:
+            budget.close()
@@ -1,16 +1,90 @@
+import argparse
 import base64
+import functools
+import http.client
 import logging
+import math
+import os
 import sys
 import xmlrpc.client
+from dataclasses import dataclass, field
 from http import HTTPStatus
-from typing import Union
+from typing import Iterator, List, NamedTuple, Optional, Union
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
 
 import requests
 
-from exceptions import ExceptionStatusError
-import time
+from cache import HttpCache
+from exceptions import ExceptionStatusError, OdooRpcError
+from fetcher import Fetcher
+from images import ImagePipeline
+from metrics import Metrics
+from odoo_client import OdooPool
+from odoo_index import NameIndex
+from state import SyncReport, SyncState
+from transport import TransportPolicy
+
+
+class Character(NamedTuple):
+    """
+    Персонаж SWAPI с однократно извлеченными идентификаторами.
+    """
+    swapi_id: str
+    name: str
+    homeworld_id: str
+
+    @classmethod
+    def from_swapi(cls, data: dict) -> 'Character':
+        return cls(
+            data['url'].split('/')[-2],
+            data['name'],
+            data['homeworld'].split('/')[-2],
+        )
+
+
+@dataclass
+class PeopleCrawl:
+    """
+    Результат однократного обхода people/.
+    ...
+    Атрибуты
+    --------
+    characters : list
+        все персонажи (Character) в порядке страниц
+    homeworld_urls : set
+        уникальные адреса родных планет
+    planets : dict
+        id планеты -> данные планеты
+    characters_by_planet : dict
+        id планеты -> список персонажей с этой родной планетой
+    """
+    characters: list = field(default_factory=list)
+    homeworld_urls: set = field(default_factory=set)
+    planets: dict = field(default_factory=dict)
+    characters_by_planet: dict = field(default_factory=dict)
+
+    def add(self, data: dict) -> bool:
+        """
+        Добавляет персонажа из ответа SWAPI в список и группировку.
+        ---------
+        Возвращаемое значение
+        ---------------------
+        bool
+            True, если родная планета персонажа встретилась впервые
+        """
+        character = Character.from_swapi(data)
+        self.characters.append(character)
+        group = self.characters_by_planet.get(character.homeworld_id)
+        if group is None:
+            group = self.characters_by_planet[character.homeworld_id] = []
+        group.append(character)
+
+        homeworld_url = data['homeworld']
+        if homeworld_url in self.homeworld_urls:
+            return False
+        self.homeworld_urls.add(homeworld_url)
+        return True
 
-t = time.time()
 
 class Swapi:
     """
@@ -22,23 +96,133 @@ class Swapi:
         адрес для запроса данных
     picture_url : str
         адрес для получения изображений
+    fetcher : Fetcher
+        пул соединений для выполнения запросов
     Методы
     ------
+    iter_pages():
+        Параллельно получает страницы любой коллекции SWAPI.
+    get_collection():
+        Получает все записи коллекции SWAPI.
     get_characters():
         Получает данные о всех персонажах.
     get_planets():
         Получает данные о всех планетах.
-    get_planets():
-        Получает данные о всех планетах.
+    crawl_people():
+        Получает персонажей и их планеты за один обход people/.
+    request_image():
+        Запрашивает изображение персонажа.
     download_images():
         Получает изображения для всех персонажей.
+    prefetch_images():
+        Запускает параллельную загрузку изображений персонажей.
     """
 
-    def __init__(self) -> None:
-        self.base_url: str = "https://swapi.dev/api/"
-        self.picture_url: str = (
-            'https://starwars-visualguide.com/assets/img/characters/{}.jpg'
-        )
+    def __init__(
+            self,
+            fetcher: Optional[Fetcher] = None,
+            base_url: str = "https://swapi.dev/api/",
+            picture_url: str = (
+                'https://starwars-visualguide.com/assets/img/characters/{}.jpg'
+            ),
+    ) -> None:
+        self.base_url: str = base_url
+        self.picture_url: str = picture_url
+        self.fetcher: Fetcher = fetcher or Fetcher()
+
+    def _get(self, url: str) -> requests.Response:
+        """
+        Выполняет запрос и проверяет статус ответа.
+        ---------
+        Возвращаемое значение
+        ---------------------
+        requests.Response
+        """
+        try:
+            logging.info(f'Request running {url}')
+            response = self.fetcher.get(url)
+        except requests.RequestException as error:
+            raise ConnectionError(f'Request failed {url}, {error}')
+        if response.status_code != HTTPStatus.OK:
+            raise ExceptionStatusError((
+                f"Program failure: {url} "
+                f"{response.status_code}"
+                f"{response.reason}"
+                f"{response.text}"
+                )
+            )
+        return response
+
+    def _get_json(self, url: str) -> dict:
+        return self._get(url).json()
+
+    @staticmethod
+    def _page_url(url: str, page: int) -> str:
+        parts = urlsplit(url)
+        query = parse_qs(parts.query)
+        query['page'] = [str(page)]
+        return urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
+
+    @classmethod
+    def _page_urls(cls, data: dict) -> Optional[List[str]]:
+        """
+        Адреса страниц коллекции после первой, вычисленные по полю count.
+        None, если count отсутствует и страницы нужно обходить по next.
+        """
+        count = data.get('count')
+        page_size = len(data['results'])
+        if not (data['next'] and count and page_size):
+            return None
+        return [
+            cls._page_url(data['next'], page)
+            for page in range(2, math.ceil(count / page_size) + 1)
+        ]
+
+    def iter_pages(self, resource: str) -> Iterator[dict]:
+        """
+        Получает страницы коллекции SWAPI по порядку.
+        После первой страницы адреса остальных вычисляются по полю count
+        и запрашиваются параллельно. Если count отсутствует, страницы
+        загружаются последовательно по полю next.
+        ---------
+        resource : str
+            имя коллекции, например "people/" или "planets/"
+        ---------------------
+        Iterator[dict]
+        """
+        url: str = f"{self.base_url}{resource}"
+        data: dict = self._get_json(url)
+        yield data
+
+        page_urls = self._page_urls(data)
+        if page_urls is not None:
+            futures = [
+                self.fetcher.executor.submit(self._get_json, page_url)
+                for page_url in page_urls
+            ]
+            for future in futures:
+                yield future.result()
+            return
+
+        url = data['next']
+        while url:
+            data = self._get_json(url)
+            yield data
+            url = data['next']
+
+    def get_collection(self, resource: str) -> list:
+        """
+        Получает все записи коллекции SWAPI.
+        ---------
+        resource : str
+            имя коллекции, например "people/" или "planets/"
+        ---------------------
+        list
+        """
+        results: list = []
+        for data in self.iter_pages(resource):
+            results.extend(data['results'])
+        return results
 
     def get_characters(self) -> list:
         """
@@ -48,27 +232,24 @@ class Swapi:
         ---------------------
         list
         """
-        url: str = f"{self.base_url}people/"
-        characters: list = []
+        return self.get_collection('people/')
 
-        while url:
-            try:
-                logging.info(f'Request running {url}')
-                response = requests.get(url)
-            except requests.RequestException as error:
-                raise ConnectionError(f'Request failed {url}, {error}')
-            if response.status_code != HTTPStatus.OK:
-                raise ExceptionStatusError((
-                    f"Program failure: {url} "
-                    f"{response.status_code}"
-                    f"{response.reason}"
-                    f"{response.text}"
-                    )
-                )
-            data: dict = response.json()
-            characters.extend(data['results'])
-            url = data['next']
-        return characters
+    def get_planet(self, homeworld_url: str) -> dict:
+        """
+        Получает информацию об одной планете.
+        ---------
+        Возвращаемое значение
+        ---------------------
+        dict
+        """
+        homeworld_data = self._get(homeworld_url).json()
+        return {
+            'name': homeworld_data['name'],
+            'diameter': homeworld_data['diameter'],
+            'population': homeworld_data['population'],
+            'rotation_period': homeworld_data['rotation_period'],
+            'orbital_period': homeworld_data['orbital_period'],
+        }
 
     def get_planets(self) -> dict:
         """
@@ -78,84 +259,95 @@ class Swapi:
         ---------------------
         dict
         """
-        url: str = f"{self.base_url}people/"
-        homeworlds: dict = {}
-        homeworld_urls = set()
+        return self.crawl_people().planets
 
-        while url:
-            try:
-                logging.info(f'Выполняется запрос {url}')
-                response = requests.get(url)
-            except requests.RequestException as error:
-                raise ConnectionError(f'Сбой программы {url}, {error}')
-
-            if response.status_code != HTTPStatus.OK:
-                raise ExceptionStatusError((
-                    f"Сбой программы: {url} "
-                    f"{response.status_code}"
-                    f"{response.reason}"
-                    f"{response.text}"
-                    )
-                )
-            data: dict = response.json()
-            for planet in data['results']:
-                homeworld_urls.add(planet['homeworld'])
+    def crawl_people(self) -> PeopleCrawl:
+        """
+        Обходит people/ один раз, собирая персонажей и их планеты.
+        Загрузка планеты начинается, как только ее адрес встретился
+        на очередной странице.
+        ---------
+        Возвращаемое значение
+        ---------------------
+        PeopleCrawl
+        """
+        crawl = PeopleCrawl()
+        planet_futures: dict = {}
 
-            url = data['next']
-        for homeworld_url in homeworld_urls:
-            try:
-                logging.info(f'Выполняется запрос {homeworld_url}')
-                homeworld_response = requests.get(homeworld_url)
-                homeworld_data = homeworld_response.json()  
-                homeworld_id = homeworld_url.split('/')[-2]
-                homeworlds[homeworld_id] = {
-                    'name': homeworld_data['name'],
-                    'diameter': homeworld_data['diameter'],
-                    'population': homeworld_data['population'],
-                    'rotation_period': homeworld_data['rotation_period'],
-                    'orbital_period': homeworld_data['orbital_period'],
-                }
-            except requests.RequestException as error:
-                raise ConnectionError(f'Сбой программы {homeworld_url}, {error}')
-
-            if homeworld_response.status_code != HTTPStatus.OK:
-                raise ExceptionStatusError((
-                    f"Сбой программы: {homeworld_url} "
-                    f"{homeworld_response.status_code}"
-                    f"{homeworld_response.reason}"
-                    f"{homeworld_response.text}"
+        for data in self.iter_pages('people/'):
+            for character in data['results']:
+                if crawl.add(character):
+                    homeworld_url = character['homeworld']
+                    planet_futures[homeworld_url] = (
+                        self.fetcher.executor.submit(
+                            self.get_planet, homeworld_url
+                        )
                     )
-                )
 
-        return homeworlds
+        crawl.planets = {
+            homeworld_url.split('/')[-2]: future.result()
+            for homeworld_url, future in planet_futures.items()
+        }
+        return crawl
 
-    def download_images(self, character_id: int) -> Union[bytes, None]:
+    def request_image(
+            self, character_id, stream: bool = False
+    ) -> Optional[requests.Response]:
         """
-        Получает изображение персонажей.
+        Запрашивает изображение персонажа.
         ---------
-        Возвращаемое значение
+        character_id : int или str
+            id персонажа в SWAPI
+        stream : bool
+            не читать тело ответа сразу; ответ закрывает вызывающий
         ---------------------
-        bytes
+        requests.Response или None, если изображения нет
         """
+        url = self.picture_url.format(character_id)
         try:
-            logging.info((
-                f'Request running '
-                f'{self.picture_url.format(character_id)}'
-                )
-            )
-            response = requests.get(self.picture_url.format(character_id))
+            logging.info(f'Request running {url}')
+            response = self.fetcher.get(url, stream=stream)
         except requests.RequestException as error:
-            raise ConnectionError((
-                f'Program failure '
-                f'{self.picture_url.format(character_id)}, {error}'))
+            raise ConnectionError(f'Program failure {url}, {error}')
         if response.status_code != HTTPStatus.OK:
+            response.close()
             logging.error(
                 f'Не удалось получить изображения '
                 f'для {character_id}'
             )
             return None
+        return response
+
+    def download_images(self, character_id: int) -> Union[bytes, None]:
+        """
+        Получает изображение персонажей.
+        ---------
+        Возвращаемое значение
+        ---------------------
+        bytes
+        """
+        response = self.request_image(character_id)
+        if response is None:
+            return None
         return response.content
 
+    def prefetch_images(self, character_ids: list) -> dict:
+        """
+        Запускает параллельную загрузку изображений персонажей.
+        ---------
+        character_ids : list
+            идентификаторы персонажей в SWAPI
+        ---------------------
+        dict
+            идентификатор персонажа -> Future с результатом download_images
+        """
+        return {
+            character_id: self.fetcher.executor.submit(
+                self.download_images, character_id
+            )
+            for character_id in character_ids
+        }
+
 
 class Odoo:
     """
@@ -164,42 +356,122 @@ class Odoo:
     Атрибуты
     --------
     url : str
-        адрес сервера
+        адрес сервера, по умолчанию ODOO_URL
     db : str
-        название БД
+        название БД, по умолчанию ODOO_DB
     username : str
-        логин superuser
+        логин superuser, по умолчанию ODOO_USERNAME
     password : str
-        пароль superuser
+        пароль superuser, по умолчанию ODOO_PASSWORD
+    protocol : str
+        "xmlrpc" или "jsonrpc", по умолчанию ODOO_PROTOCOL
+    models : OdooPool
+        пул соединений, аутентифицируется один раз; можно передать
+        любой клиент с методами authenticate, execute_kw и close
+    chunk_size : int
+        количество записей в одном пакетном create
+    policy : TransportPolicy
+        таймауты, повторы, лимит частоты и предохранитель
     Методы
     ------
     create_planet():
         создает планету в БД
     create_characters():
         создает контакт в БД.
+    create_many():
+        пакетно создает записи модели.
+    create_planets():
+        пакетно создает планеты.
+    create_partners():
+        пакетно создает контакты.
+    character_values():
+        данные контакта для записи в БД.
     get_character():
         Получает данные о контакте в Odoo.
     get_planet():
         Получает данные о планете в Odoo
+    search_read_all():
+        Постранично читает записи модели.
+    write():
+        Обновляет запись модели.
+    execute():
+        Вызывает метод модели по политике транспорта.
+    close():
+        Закрывает соединения с Odoo.
     """
 
-    def __init__(self):
-        self.url = 'http://localhost:8069/'
-        self.db = 'odoo16'
-        self.username = 'admin'
-        self.password = 'admin'
+    IDEMPOTENT_METHODS = frozenset({
+        'search', 'search_read', 'search_count', 'read', 'fields_get',
+        'write',
+    })
 
-        self.common = xmlrpc.client.ServerProxy(
-            '{}/xmlrpc/2/common'.format(self.url)
+    def __init__(
+            self, chunk_size: int = 50,
+            policy: Optional[TransportPolicy] = None,
+            url: Optional[str] = None,
+            db: Optional[str] = None,
+            username: Optional[str] = None,
+            password: Optional[str] = None,
+            protocol: Optional[str] = None,
+            pool_size: int = 4,
+            models=None,
+    ):
+        self.url = url or os.getenv('ODOO_URL', 'http://localhost:8069/')
+        self.db = db or os.getenv('ODOO_DB', 'odoo16')
+        self.username = username or os.getenv('ODOO_USERNAME', 'admin')
+        self.password = password or os.getenv('ODOO_PASSWORD', 'admin')
+        self.protocol = protocol or os.getenv('ODOO_PROTOCOL', 'xmlrpc')
+        self.chunk_size = chunk_size
+        self.policy = policy or TransportPolicy()
+
+        self.models = models or OdooPool(
+            self.url, protocol=self.protocol, size=pool_size,
+            timeout=self.policy.timeout,
         )
-        self.uid = self.common.authenticate(
-            self.db, self.username, self.password, {}
+        self.uid = self._call(
+            lambda: self.models.authenticate(
+                self.db, self.username, self.password
+            )
         )
 
-        self.models = xmlrpc.client.ServerProxy(
-            '{}/xmlrpc/2/object'.format(self.url)
+    def _call(self, func, idempotent: bool = True):
+        return self.policy.call(
+            urlsplit(self.url).netloc, func, idempotent=idempotent,
+            retry_on=(OSError, http.client.HTTPException),
         )
 
+    def execute(
+            self, model: str, method: str, args: list,
+            kwargs: Optional[dict] = None,
+    ):
+        """
+        Вызывает метод модели через execute_kw по политике транспорта.
+        Повторяются только идемпотентные методы.
+        ---------
+        model : str
+            имя модели Odoo
+        method : str
+            имя метода
+        args : list
+            позиционные аргументы метода
+        kwargs : dict
+            именованные аргументы метода
+        ---------------------
+        результат метода
+        """
+        return self._call(
+            lambda: self._execute_kw(model, method, args, kwargs or {}),
+            idempotent=method in self.IDEMPOTENT_METHODS,
+        )
+
+    def _execute_kw(self, model, method, args, kwargs):
+        return self.models.execute_kw(
+            self.db, self.uid, self.password, model, method, args, kwargs
+        )
+
+    def close(self) -> None:
+        self.models.close()
+
     def create_planet(self, create_planet_data):
         """
         создает новую запись в БД
@@ -208,10 +480,115 @@ class Odoo:
             словарь с данными о планете
         ---------------------
         """
-        return self.models.execute_kw(
-            self.db, self.uid, self.password, 'res.planet', 'create',
-            [create_planet_data]
-        )
+        return self.execute('res.planet', 'create', [create_planet_data])
+
+    def create_many(
+            self, model: str, records: dict, chunk_size: Optional[int] = None
+    ) -> dict:
+        """
+        Пакетно создает записи, по chunk_size в одном вызове create.
+        Если сервер отклонил пакет, его записи создаются по одной.
+        При ошибке транспорта (таймаут, обрыв соединения) сервер мог
+        уже записать пакет, поэтому он не отправляется повторно
+        и считается не созданным.
+        ---------
+        model : str
+            имя модели Odoo
+        records : dict
+            id в SWAPI -> данные записи
+        chunk_size : int
+            размер пакета, по умолчанию self.chunk_size
+        ---------------------
+        dict
+            id в SWAPI -> id созданной записи в Odoo
+        """
+        chunk_size = chunk_size or self.chunk_size
+        remote_ids = list(records)
+        created: dict = {}
+
+        for start in range(0, len(remote_ids), chunk_size):
+            chunk = remote_ids[start:start + chunk_size]
+            try:
+                new_ids = self.execute(
+                    model, 'create',
+                    [[records[remote_id] for remote_id in chunk]]
+                )
+                created.update(zip(chunk, new_ids))
+                continue
+            except (OdooRpcError, xmlrpc.client.Fault) as e:
+                logging.error(
+                    f"Batch create failed: Model: {model}, "
+                    f"Size: {len(chunk)}, Error: {e}"
+                )
+            except Exception as e:
+                logging.error(
+                    f"Batch create outcome unknown, not retried: "
+                    f"Model: {model}, Size: {len(chunk)}, Error: {e}"
+                )
+                continue
+            for remote_id in chunk:
+                try:
+                    created[remote_id] = self.execute(
+                        model, 'create', [records[remote_id]]
+                    )
+                except Exception as e:
+                    logging.error(
+                        f"Failed to create: Model: {model}, "
+                        f"Remote ID: {remote_id}, Error: {e}"
+                    )
+        return created
+
+    def create_planets(self, planets: dict) -> dict:
+        """
+        Пакетно создает планеты.
+        ---------
+        planets : dict
+            id планеты в SWAPI -> данные планеты
+        ---------------------
+        dict
+            id планеты в SWAPI -> id планеты в Odoo
+        """
+        return self.create_many('res.planet', planets)
+
+    def create_partners(self, partners: dict) -> dict:
+        """
+        Пакетно создает контакты.
+        ---------
+        partners : dict
+            id персонажа в SWAPI -> данные из character_values()
+        ---------------------
+        dict
+            id персонажа в SWAPI -> id контакта в Odoo
+        """
+        return self.create_many('res.partner', partners)
+
+    @staticmethod
+    def character_values(
+            name: str,
+            image_data: Optional[bytes],
+            new_planet_id: int,
+            encoded_image: Optional[str] = None,
+    ) -> dict:
+        """
+        Данные контакта для записи в БД.
+        ---------
+        name : str
+            имя персонажа
+        image_data : bytes
+            изображение персонажа
+        new_planet_id: int
+            id планеты из БД
+        encoded_image : str
+            изображение, уже закодированное в base64
+        ---------------------
+        dict
+        """
+        values = {'name': name, 'planet': new_planet_id}
+        if encoded_image is None and image_data is not None:
+            encoded_image = base64.b64encode(image_data).decode('utf-8')
+        if encoded_image is not None:
+            values['image_1920'] = encoded_image
+        return values
 
     def create_characters(
             self, character: dict, image_data: bytes, new_planet_id: int
@@ -228,20 +605,12 @@ class Odoo:
         ---------------------
         """
         try:
-            if image_data is not None:
-                encoded_image = base64.b64encode(image_data).decode('utf-8')
-                return self.models.execute_kw(
-                    self.db, self.uid, self.password, 'res.partner', 'create',
-                    [{'name': character['name'],
-                        'image_1920': encoded_image,
-                        'planet': new_planet_id}]
-                    )
-            else:
-                return self.models.execute_kw(
-                    self.db, self.uid, self.password, 'res.partner', 'create',
-                    [{'name': character['name'],
-                        'planet': new_planet_id}]
-                    )
+            return self.execute(
+                'res.partner', 'create',
+                [self.character_values(
+                    character['name'], image_data, new_planet_id
+                )]
+            )
         except Exception as e:
             log_message = (f"Failed to create:"
                            f"Entity: Character,"
@@ -257,11 +626,9 @@ class Odoo:
             данные о персонаже
         ---------------------
         """
-        return self.models.execute_kw(
-                            self.db, self.uid, self.password, 'res.partner',
-                            'search',
-                            [[('name', '=', character['name'])]]
-                        )
+        return self.execute(
+            'res.partner', 'search', [[('name', '=', character['name'])]]
+        )
 
     def get_planet(self, name):
         """
@@ -271,10 +638,55 @@ class Odoo:
             данные о персонаже
         ---------------------
         """
-        return self.models.execute_kw(
-            self.db, self.uid, self.password, 'res.planet', 'search',
-            [[('name', '=', name)]]
-        )
+        return self.execute('res.planet', 'search', [[('name', '=', name)]])
+
+    def write(self, model: str, odoo_id: int, values: dict) -> bool:
+        """
+        Обновляет запись модели.
+        ---------
+        model : str
+            имя модели Odoo
+        odoo_id : int
+            id записи в Odoo
+        values : dict
+            новые значения полей
+        ---------------------
+        bool
+        """
+        return self.execute(model, 'write', [[odoo_id], values])
+
+    def search_read_all(
+            self,
+            model: str,
+            fields: list,
+            domain: Optional[list] = None,
+            page_size: int = 1000,
+    ) -> Iterator[dict]:
+        """
+        Постранично читает записи модели через search_read.
+        ---------
+        model : str
+            имя модели Odoo
+        fields : list
+            читаемые поля
+        domain : list
+            условие отбора, по умолчанию все записи
+        page_size : int
+            количество записей в одном запросе
+        ---------------------
+        Iterator[dict]
+        """
+        offset = 0
+        while True:
+            records = self.execute(
+                model, 'search_read', [domain or []],
+                {'fields': fields, 'offset': offset, 'limit': page_size,
+                 'order': 'id'}
+            )
+            yield from records
+            if len(records) < page_size:
+                return
+            offset += page_size
 
 
 class DataProcessor:
@@ -287,97 +699,526 @@ class DataProcessor:
         Экземпляр класса Swapi
     odoo_repo : class
         Экземпляр класса Odoo
+    planet_index : NameIndex
+        имена и id планет в Odoo
+    partner_index : NameIndex
+        имена и id контактов в Odoo
+    images : ImagePipeline
+        загрузка изображений с ограничением памяти
+    state : SyncState
+        состояние инкрементальной синхронизации, None - полный режим
+    refresh_images : bool
+        перепроверять изображения уже синхронизированных контактов
+    report : SyncReport
+        счетчики созданных, обновленных и пропущенных записей
     ------
     process_data():
         заполнение БД требуемыми данными
+    plan_planet():
+        определяет действие для планеты
+    flush_planets():
+        создает накопленные планеты одним пакетом
+    sync_planets():
+        создает отсутствующие планеты одним пакетом
+    plan_character():
+        определяет действие для персонажа
+    plan_characters():
+        отбирает персонажей для создания и обновления
+    create_characters():
+        создает и обновляет контакты по мере загрузки изображений
+    flush_characters():
+        создает накопленные контакты одним пакетом
     """
-    def __init__(self, swapi, odoo_repo):
+    def __init__(self, swapi, odoo_repo, images=None, state=None,
+                 refresh_images=False):
         self.swapi = swapi
         self.odoo_repo = odoo_repo
+        self.images = images or ImagePipeline(swapi)
+        self.state: Optional[SyncState] = state
+        self.refresh_images = refresh_images
+        self.planet_index = NameIndex(odoo_repo, 'res.planet')
+        self.partner_index = NameIndex(odoo_repo, 'res.partner')
+        self.report = SyncReport()
 
-    def process_data(self):
+    @staticmethod
+    def planet_values(planet_data: dict) -> dict:
         """
-        заполнение БД требуемыми данными
+        Данные планеты для записи в БД.
+        ---------
+        planet_data : dict
+            данные планеты из SWAPI
+        ---------------------
+        dict
+        """
+        values = {'name': planet_data['name']}
+        for field_name in (
+                'diameter', 'population', 'rotation_period', 'orbital_period'
+        ):
+            value = planet_data[field_name]
+            values[field_name] = str(value if value != "unknown" else 0)
+        return values
+
+    def _state_record(self, model: str, swapi_id: str):
+        if self.state is None:
+            return None
+        return self.state.get(model, swapi_id)
+
+    def _remember(self, model, swapi_id, odoo_id, values, previous=None):
+        if self.state is not None:
+            self.state.remember(model, swapi_id, odoo_id, values, previous)
+
+    def _update(self, model, swapi_id, record, values) -> bool:
+        """
+        Записывает изменившиеся данные в существующую запись.
+        """
+        try:
+            self.odoo_repo.write(model, record.odoo_id, values)
+        except Exception as e:
+            logging.error(
+                f"Failed to update: Model: {model}, "
+                f"Remote ID: {swapi_id}, Odoo ID: {record.odoo_id}, {e}"
+            )
+            self.report.add(model, 'failed')
+            return False
+        self._remember(model, swapi_id, record.odoo_id, values, record)
+        self.report.add(model, 'updated')
+        logging.info(
+            f"Updated: Model: {model}, "
+            f"Remote ID: {swapi_id}, Odoo ID: {record.odoo_id}"
+        )
+        return True
+
+    def plan_planet(self, planet_id: str, planet_data: dict) -> tuple:
+        """
+        Определяет, что сделать с планетой: создать, обновить или
+        пропустить. Пропуски сразу учитываются в отчете.
+        ---------
+        planet_id : str
+            id планеты в SWAPI
+        planet_data : dict
+            данные планеты из SWAPI
+        ---------------------
+        tuple
+            (действие, id в Odoo или None, данные планеты, StateRecord)
+        """
+        values = self.planet_values(planet_data)
+        record = self._state_record('res.planet', planet_id)
+        if record is not None:
+            if record.content_hash == self.state.content_hash(values):
+                self.report.add('res.planet', 'skipped')
+                return 'skip', record.odoo_id, values, record
+            return 'update', record.odoo_id, values, record
+
+        existing_planet = self.planet_index.get(planet_data['name'])
+        if existing_planet is not None:
+            self._remember('res.planet', planet_id, existing_planet, values)
+            self.report.add('res.planet', 'skipped')
+            logging.info(f"Planet already exist {planet_data['name']}")
+            return 'skip', existing_planet, values, None
+        return 'create', None, values, None
+
+    def flush_planets(self, new_planets: dict) -> dict:
+        """
+        Создает накопленные планеты одним пакетом.
+        ---------
+        new_planets : dict
+            id планеты в SWAPI -> данные из planet_values()
+        ---------------------
+        dict
+            id планеты в SWAPI -> id планеты в Odoo
         """
-        characters = self.swapi.get_characters()
-        planets = self.swapi.get_planets()
+        created = self.odoo_repo.create_planets(new_planets)
+        for planet_id, new_planet_id in created.items():
+            self.planet_index.add(
+                new_planets[planet_id]['name'], new_planet_id
+            )
+            self._remember(
+                'res.planet', planet_id, new_planet_id, new_planets[planet_id]
+            )
+            logging.info(
+                f"Entity: Planet, "
+                f"Name: {new_planets[planet_id]['name']}, "
+                f"Remote ID: {planet_id}, "
+                f"Odoo ID: {new_planet_id}"
+            )
+        self.report.add('res.planet', 'created', len(created))
+        self.report.add(
+            'res.planet', 'failed', len(new_planets) - len(created)
+        )
+        if self.state is not None:
+            self.state.commit()
+        return created
 
+    def sync_planets(self, planets: dict) -> dict:
+        """
+        Создает отсутствующие в БД планеты одним пакетом.
+        В инкрементальном режиме изменившиеся планеты обновляются,
+        а неизменные пропускаются без обращения к Odoo.
+        ---------
+        planets : dict
+            id планеты в SWAPI -> данные планеты
+        ---------------------
+        dict
+            id планеты в SWAPI -> id планеты в Odoo
+        """
+        planet_ids: dict = {}
+        new_planets: dict = {}
         for planet_id, planet_data in planets.items():
-            try:
-                existing_planet = self.odoo_repo.get_planet(
-                    planet_data['name']
+            action, odoo_id, values, record = self.plan_planet(
+                planet_id, planet_data
+            )
+            if action == 'create':
+                new_planets[planet_id] = values
+                continue
+            planet_ids[planet_id] = odoo_id
+            if action == 'update':
+                self._update('res.planet', planet_id, record, values)
+
+        planet_ids.update(self.flush_planets(new_planets))
+        return planet_ids
+
+    def flush_characters(self, partners: dict, names: dict) -> dict:
+        """
+        Создает накопленные контакты одним пакетом.
+        ---------
+        partners : dict
+            id персонажа в SWAPI -> данные из Odoo.character_values()
+        names : dict
+            id персонажа в SWAPI -> имя персонажа
+        ---------------------
+        dict
+            id персонажа в SWAPI -> id контакта в Odoo
+        """
+        created = self.odoo_repo.create_partners(partners)
+        for character_id, new_character_id in created.items():
+            self.partner_index.add(names[character_id], new_character_id)
+            self._remember(
+                'res.partner', character_id, new_character_id,
+                partners[character_id]
+            )
+            logging.info(
+                f"Entity: Character, "
+                f"Name: {names[character_id]}, "
+                f"Remote ID: {character_id}, "
+                f"Odoo ID: {new_character_id}"
+            )
+        self.report.add('res.partner', 'created', len(created))
+        self.report.add('res.partner', 'failed', len(partners) - len(created))
+        if self.state is not None:
+            self.state.commit()
+        return created
+
+    def create_characters(self, pending_characters: list) -> None:
+        """
+        Создает и обновляет контакты по мере загрузки изображений.
+        Пакет отправляется в БД, когда в нем набирается chunk_size
+        записей или изображения занимают больше бюджета ImagePipeline.
+        Изображения загружаются только для новых контактов, а при
+        refresh_images - и для уже синхронизированных.
+        ---------
+        pending_characters : list
+            кортежи (Character, id планеты в Odoo, StateRecord или None)
+        ---------------------
+        """
+        pending: dict = {}
+        for character, new_planet_id, record in pending_characters:
+            if record is None or self.refresh_images:
+                pending[character.swapi_id] = (
+                    character, new_planet_id, record
                 )
-                if not existing_planet:
-                    diameter = planet_data['diameter'] if planet_data['diameter'] != "unknown" else 0
-                    population = planet_data['population'] if planet_data['population'] != "unknown" else 0
-                    rotation_period = planet_data['rotation_period'] if planet_data['rotation_period'] != "unknown" else 0
-                    orbital_period = planet_data['orbital_period'] if planet_data['orbital_period'] != "unknown" else 0
-
-                    new_planet_id = self.odoo_repo.create_planet(
-                        create_planet_data={
-                            'name': planet_data['name'],
-                            'diameter': str(diameter),
-                            'population': str(population),
-                            'rotation_period': str(rotation_period),
-                            'orbital_period': str(orbital_period)
-                        }
+            else:
+                self._update(
+                    'res.partner', character.swapi_id, record,
+                    self.odoo_repo.character_values(
+                        character.name, None, new_planet_id
                     )
-                    log_message = (f"Entity: Planet, "
-                                   f"Name: {planet_data['name'],}, "
-                                   f"Remote ID: {planet_id}, "
-                                   f"Odoo ID: {new_planet_id}"
-                                   )
-                    logging.info(log_message)
-                else:
-                    new_planet_id = existing_planet[0]
-                    logging.info(f"Planet already exist {planet_data['name']}")
-            except Exception as e:
-                logging.error(f'Failed to create: {log_message}, {e}')
+                )
+
+        partners: dict = {}
+        names: dict = {}
+        batch_bytes = 0
+
+        for result in self.images.run(list(pending)):
+            character, new_planet_id, record = pending[result.character_id]
+            if result.error is not None:
+                logging.error(
+                    f"не удалось создать: "
+                    f"Entity: Character, "
+                    f"Name: {character.name}, "
+                    f"Remote ID: {character.swapi_id}, {result.error}"
+                )
+                self.report.add('res.partner', 'failed')
+                continue
+            values = self.odoo_repo.character_values(
+                character.name, None, new_planet_id,
+                encoded_image=result.encoded,
+            )
+            if record is not None:
+                self._refresh_character(character.swapi_id, record, values)
+                continue
+
+            partners[character.swapi_id] = values
+            names[character.swapi_id] = character.name
+            batch_bytes += len(result.encoded or '')
+
+            if (len(partners) >= self.odoo_repo.chunk_size
+                    or batch_bytes >= self.images.max_in_flight_bytes):
+                self.flush_characters(partners, names)
+                partners, names, batch_bytes = {}, {}, 0
+
+        if partners:
+            self.flush_characters(partners, names)
+
+    def _refresh_character(self, swapi_id, record, values) -> None:
+        image_hash = self.state.image_hash(values.get('image_1920'))
+        if image_hash == record.image_hash:
+            values.pop('image_1920', None)
+        if (record.content_hash == self.state.content_hash(values)
+                and 'image_1920' not in values):
+            self.report.add('res.partner', 'skipped')
+        else:
+            self._update('res.partner', swapi_id, record, values)
+
+    def plan_character(
+            self, character: Character, new_planet_id: Optional[int]
+    ) -> Optional[tuple]:
+        """
+        Определяет, нужно ли создать или обновить контакт.
+        Пропуски и ошибки сразу учитываются в отчете.
+        ---------
+        character : Character
+            персонаж SWAPI
+        new_planet_id : int
+            id его планеты в Odoo, None - планета не записана
+        ---------------------
+        tuple или None
+            (Character, id планеты в Odoo, StateRecord или None)
+        """
+        if new_planet_id is None:
+            logging.error(
+                f"Planet is missing in Odoo, skipped: "
+                f"Entity: Character, "
+                f"Name: {character.name}, "
+                f"Remote ID: {character.swapi_id}"
+            )
+            self.report.add('res.partner', 'failed')
+            return None
+
+        record = self._state_record('res.partner', character.swapi_id)
+        if record is not None:
+            values = self.odoo_repo.character_values(
+                character.name, None, new_planet_id
+            )
+            if (self.refresh_images
+                    or record.content_hash != self.state.content_hash(values)):
+                return character, new_planet_id, record
+            self.report.add('res.partner', 'skipped')
+            return None
+
+        existing_character = self.partner_index.get(character.name)
+        if existing_character is not None:
+            logging.info(
+                f"Contact already exist {character.name}"
+            )
+            self._remember(
+                'res.partner', character.swapi_id, existing_character,
+                self.odoo_repo.character_values(
+                    character.name, None, new_planet_id
+                )
+            )
+            self.report.add('res.partner', 'skipped')
+            return None
+        return character, new_planet_id, None
+
+    def plan_characters(self, crawl: PeopleCrawl, planet_ids: dict) -> list:
+        """
+        Отбирает персонажей, которых нужно создать или обновить в БД,
+        вместе с id их планет. Каждая группа персонажей берется из готовой
+        группировки по родной планете, поэтому стоимость линейна по числу
+        персонажей.
+        ---------
+        crawl : PeopleCrawl
+            результат обхода people/
+        planet_ids : dict
+            id планеты в SWAPI -> id планеты в Odoo
+        ---------------------
+        list
+            кортежи (Character, id планеты в Odoo, StateRecord или None)
+        """
+        pending_characters: list = []
+        for planet_id, characters in crawl.characters_by_planet.items():
+            new_planet_id = planet_ids.get(planet_id)
             for character in characters:
+                item = self.plan_character(character, new_planet_id)
+                if item is not None:
+                    pending_characters.append(item)
+        return pending_characters
 
-                character_id = character['url'].split('/')[-2]
-                character_planet_id = character['homeworld'].split('/')[-2]
-
-                if character_planet_id == planet_id:
-                    try:
-                        existing_character = self.odoo_repo.get_character(character=character)
-
-                        if not existing_character:
-                            image_data = self.swapi.download_images(character_id=character_id)
-
-                            new_character_id = self.odoo_repo.create_characters(
-                                character=character,
-                                image_data=image_data,
-                                new_planet_id=new_planet_id,
-                            )
-                            log_message = (f"Entity: Character, "
-                                           f"Name: {character['name']}, "
-                                           f"Remote ID: {character_id}, "
-                                           f"Odoo ID: {new_character_id}")
-                            logging.info(log_message)
-                        else:
-                            new_character_id = existing_character[0]
-                            logging.info(
-                                f"Contact already exist {character['name']}"
-                            )
-                    except Exception as e:
-                        log_message = (
-                            f"не удалось создать: "
-                            f"Entity: Character, "
-                            f"Name: {character['name']}, "
-                            f"Remote ID: {character_id}, "
-                            f"Odoo ID: {new_character_id}")
-                        logging.error(log_message, e)
-
-
-def main():
-    swapi = Swapi()
-    odoo_repo = Odoo()
-    processor = DataProcessor(swapi, odoo_repo)
-    processor.process_data()
+    def process_data(self) -> SyncReport:
+        """
+        заполнение БД требуемыми данными
+        ---------
+        Возвращаемое значение
+        ---------------------
+        SyncReport
+            количество созданных, обновленных и пропущенных записей
+        """
+        crawl = self.swapi.crawl_people()
+        planet_ids = self.sync_planets(crawl.planets)
+        self.create_characters(self.plan_characters(crawl, planet_ids))
+        if self.state is not None:
+            self.state.commit()
+        logging.info(f'Sync finished: {self.report.summary()}')
+        return self.report
 
 
-if __name__ == '__main__':
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Загрузка персонажей и планет SWAPI в Odoo.'
+    )
+    parser.add_argument(
+        '--cache-dir', default=None,
+        help='каталог дискового кэша ответов SWAPI (по умолчанию выключен)'
+    )
+    parser.add_argument(
+        '--cache-ttl', type=float, default=24 * 60 * 60,
+        help='время жизни записи кэша в секундах'
+    )
+    parser.add_argument(
+        '--cache-max-size', type=int, default=256 * 1024 * 1024,
+        help='максимальный размер кэша в байтах'
+    )
+    parser.add_argument(
+        '--cache-only', action='store_true',
+        help='не обращаться к сети, использовать только кэш'
+    )
+    parser.add_argument(
+        '--timeout', type=float, default=30.0,
+        help='таймаут одного запроса к SWAPI и Odoo в секундах'
+    )
+    parser.add_argument(
+        '--retries', type=int, default=3,
+        help='количество повторов идемпотентного запроса'
+    )
+    parser.add_argument(
+        '--rate-limit', type=float, default=None,
+        help='максимум запросов в секунду на один хост'
+    )
+    parser.add_argument(
+        '--odoo-url', default=None,
+        help='адрес Odoo (по умолчанию ODOO_URL или http://localhost:8069/)'
+    )
+    parser.add_argument(
+        '--odoo-db', default=None,
+        help='имя БД Odoo (по умолчанию ODOO_DB или odoo16)'
+    )
+    parser.add_argument(
+        '--odoo-protocol', choices=('xmlrpc', 'jsonrpc'), default=None,
+        help='протокол Odoo (по умолчанию ODOO_PROTOCOL или xmlrpc)'
+    )
+    parser.add_argument(
+        '--odoo-pool-size', type=int, default=4,
+        help='количество соединений с Odoo'
+    )
+    parser.add_argument(
+        '--async', dest='async_mode', action='store_true',
+        help='запустить асинхронный конвейер (AsyncDataProcessor)'
+    )
+    parser.add_argument(
+        '--state', default=None,
+        help='файл состояния для инкрементальной синхронизации'
+    )
+    parser.add_argument(
+        '--refresh-images', action='store_true',
+        help='перепроверять изображения уже синхронизированных контактов'
+    )
+    parser.add_argument(
+        '--image-budget', type=int, default=16 * 1024 * 1024,
+        help='бюджет памяти на изображения в обработке, в байтах'
+    )
+    parser.add_argument(
+        '--image-max-dimension', type=int, default=None,
+        help='уменьшать изображения до этой стороны (нужен Pillow)'
+    )
+    parser.add_argument(
+        '--metrics-json', default=None,
+        help='сохранить метрики запуска в JSON-файл'
+    )
+    parser.add_argument(
+        '--metrics-textfile', default=None,
+        help='сохранить метрики в формате Prometheus textfile'
+    )
+    parser.add_argument(
+        '--shards', type=int, default=1,
+        help='разделить синхронизацию контактов между процессами '
+             'по родным планетам (несовместимо с --metrics-json '
+             'и --metrics-textfile)'
+    )
+    args = parser.parse_args(argv)
+    if args.shards > 1 and (args.metrics_json or args.metrics_textfile):
+        parser.error(
+            '--metrics-json и --metrics-textfile не поддерживаются '
+            'вместе с --shards'
+        )
+    return args
+
+
+def build_policy(args) -> TransportPolicy:
+    return TransportPolicy(
+        timeout=args.timeout, retries=args.retries, rate=args.rate_limit
+    )
+
+
+def build_swapi(args, policy: Optional[TransportPolicy] = None) -> Swapi:
+    cache = None
+    if args.cache_dir or args.cache_only:
+        cache = HttpCache(
+            path=args.cache_dir or '.swapi_cache',
+            ttl=args.cache_ttl,
+            max_size=args.cache_max_size,
+            offline=args.cache_only,
+        )
+    return Swapi(fetcher=Fetcher(policy=policy, cache=cache))
+
+
+def build_processor(args) -> DataProcessor:
+    """
+    Создает DataProcessor с собственными клиентами Swapi и Odoo
+    по аргументам командной строки.
+    """
+    policy = build_policy(args)
+    swapi = build_swapi(args, policy)
+    odoo_repo = Odoo(
+        policy=policy,
+        url=args.odoo_url,
+        db=args.odoo_db,
+        protocol=args.odoo_protocol,
+        pool_size=args.odoo_pool_size,
+    )
+    images = ImagePipeline(
+        swapi,
+        max_in_flight_bytes=args.image_budget,
+        max_dimension=args.image_max_dimension,
+    )
+    state = SyncState(args.state) if args.state else None
+    processor_class = DataProcessor
+    if args.async_mode:
+        from async_etl import AsyncDataProcessor
+        processor_class = AsyncDataProcessor
+    return processor_class(
+        swapi, odoo_repo, images,
+        state=state, refresh_images=args.refresh_images,
+    )
+
+
+def close_processor(processor: DataProcessor) -> None:
+    processor.odoo_repo.close()
+    processor.swapi.fetcher.close()
+    if processor.state is not None:
+        processor.state.close()
+
+
+def configure_logging():
     logging.basicConfig(
         level=logging.INFO,
         format=(
@@ -390,4 +1231,32 @@ if __name__ == '__main__':
             logging.StreamHandler(sys.stdout)
         ]
     )
-    main()
\ No newline at end of file
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.shards > 1:
+        from sharded import ShardedDataProcessor
+        ShardedDataProcessor(
+            functools.partial(build_processor, args), args.shards,
+            initializer=configure_logging,
+        ).process_data()
+        return
+
+    processor = build_processor(args)
+    metrics = Metrics()
+    metrics.instrument(processor)
+    try:
+        processor.process_data()
+    finally:
+        close_processor(processor)
+        print(metrics.summary())
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+        if args.metrics_textfile:
+            metrics.write_textfile(args.metrics_textfile)
+
+
+if __name__ == '__main__':
+    configure_logging()
+    main()
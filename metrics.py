@@ -0,0 +1,337 @@
+import functools
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Tuple
+from urllib.parse import urlsplit
+
+from state import IMAGE_FIELD
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+PROCESSOR_STAGES = (
+    'process_data', 'sync_planets', 'flush_planets', 'plan_characters',
+    'create_characters', 'flush_characters',
+)
+PREFIX = 'swapi_sync'
+
+
+class Histogram:
+    """
+    Гистограмма длительностей с фиксированными границами корзин.
+    Квантили оцениваются по верхней границе корзины.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q * self.count)
+        seen = 0
+        for position, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if position < len(self.buckets):
+                    return min(self.buckets[position], self.max)
+                break
+        return self.max
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            yield f'{bound:g}', seen
+        yield '+Inf', self.count
+
+
+class Metrics:
+    """
+    Метрики синхронизации: длительности этапов, HTTP-запросов к SWAPI
+    и вызовов Odoo RPC, количество байт, попадания в кэш, ошибки
+    и повторы. Экземпляры Swapi, Odoo и DataProcessor подключаются
+    методом instrument() без изменения их интерфейса.
+    ...
+    Атрибуты
+    --------
+    histograms : dict
+        (вид, имя) -> Histogram; виды: stage, http, rpc
+    counters : Counter
+        (вид, имя, счетчик) -> значение; счетчики: bytes, cache_hits
+        (ответ из кэша без обращения к сети), revalidations (ответ
+        из кэша после 304), errors (исключения), bad_status (ответы
+        не 2xx), retries
+    Методы
+    ------
+    instrument():
+        Подключает метрики к DataProcessor, его Swapi и Odoo.
+    summary():
+        Таблица итогов для вывода в конце запуска.
+    write_json():
+        Сохраняет метрики в JSON.
+    write_textfile():
+        Сохраняет метрики в текстовом формате Prometheus.
+    """
+
+    KINDS = ('stage', 'http', 'rpc')
+
+    def __init__(self) -> None:
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        """
+        Имя эндпоинта без идентификаторов и параметров запроса,
+        например swapi.dev/api/planets/{id}/.
+        """
+        parts = urlsplit(url)
+        return parts.netloc + re.sub(r'\d+', '{id}', parts.path)
+
+    def observe(self, kind: str, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get((kind, name))
+            if histogram is None:
+                histogram = self.histograms[(kind, name)] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(
+            self, kind: str, name: str, counter: str, value: int = 1
+    ) -> None:
+        with self._lock:
+            self.counters[(kind, name, counter)] += value
+
+    @contextmanager
+    def timer(self, kind: str, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment(kind, name, 'errors')
+            raise
+        finally:
+            self.observe(kind, name, time.perf_counter() - started)
+
+    def wrap(self, kind: str, name: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.timer(kind, name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def instrument_swapi(self, swapi) -> None:
+        """
+        Замеряет HTTP-запросы Fetcher по эндпоинтам: длительность
+        до получения заголовков, байты, попадания в кэш, перепроверки
+        и ответы с кодом не 2xx.
+        """
+        fetcher = swapi.fetcher
+        get = fetcher.get
+
+        @functools.wraps(get)
+        def timed_get(url, *args, **kwargs):
+            name = self.endpoint(url)
+            with self.timer('http', name):
+                response = get(url, *args, **kwargs)
+            if getattr(response, 'revalidated', False):
+                self.increment('http', name, 'revalidations')
+            elif getattr(response, 'from_cache', False):
+                self.increment('http', name, 'cache_hits')
+            if not 200 <= response.status_code < 300:
+                self.increment('http', name, 'bad_status')
+            if response.headers.get('Content-Length'):
+                size = int(response.headers['Content-Length'])
+            elif getattr(response, '_content_consumed', False):
+                size = len(response.content or b'')
+            else:
+                size = 0
+            self.increment('http', name, 'bytes', size)
+            return response
+
+        fetcher.get = timed_get
+        swapi.crawl_people = self.wrap(
+            'stage', 'crawl_people', swapi.crawl_people
+        )
+        self._watch_retries(fetcher.policy)
+
+    def instrument_odoo(self, odoo_repo) -> None:
+        """
+        Замеряет каждую попытку вызова Odoo RPC по модели и методу.
+        Байтами считается размер изображений в create и write.
+        """
+        execute_kw = odoo_repo._execute_kw
+
+        @functools.wraps(execute_kw)
+        def timed_execute_kw(model, method, args, kwargs):
+            name = f'{model}.{method}'
+            with self.timer('rpc', name):
+                result = execute_kw(model, method, args, kwargs)
+            self.increment('rpc', name, 'bytes', self._image_bytes(
+                method, args
+            ))
+            return result
+
+        odoo_repo._execute_kw = timed_execute_kw
+        self._watch_retries(odoo_repo.policy)
+
+    def instrument_processor(self, processor) -> None:
+        """
+        Замеряет этапы DataProcessor и загрузку изображений.
+        """
+        for stage in PROCESSOR_STAGES:
+            method = getattr(processor, stage, None)
+            if method is not None:
+                setattr(processor, stage, self.wrap('stage', stage, method))
+        if processor.images is not None:
+            processor.images.encode = self.wrap(
+                'stage', 'encode_image', processor.images.encode
+            )
+
+    def instrument(self, processor) -> None:
+        self.instrument_swapi(processor.swapi)
+        self.instrument_odoo(processor.odoo_repo)
+        self.instrument_processor(processor)
+
+    def _watch_retries(self, policy) -> None:
+        policy.on_retry = lambda host, error: self.increment(
+            'host', host, 'retries'
+        )
+
+    @staticmethod
+    def _image_bytes(method: str, args: list) -> int:
+        if method == 'create' and args:
+            records = args[0] if isinstance(args[0], list) else [args[0]]
+        elif method == 'write' and len(args) > 1:
+            records = [args[1]]
+        else:
+            return 0
+        return sum(len(record.get(IMAGE_FIELD) or '') for record in records)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            result: dict = {kind: {} for kind in self.KINDS}
+            result['retries'] = {}
+            for (kind, name), histogram in sorted(self.histograms.items()):
+                result[kind][name] = {
+                    'count': histogram.count,
+                    'seconds': round(histogram.total, 6),
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'max': round(histogram.max, 6),
+                    'buckets': dict(histogram.cumulative()),
+                }
+            for (kind, name, counter), value in sorted(self.counters.items()):
+                if counter == 'retries':
+                    result['retries'][name] = value
+                else:
+                    result[kind].setdefault(name, {})[counter] = value
+        return result
+
+    def summary(self) -> str:
+        """
+        Таблица итогов: количество вызовов, суммарное время, квантили
+        длительности, байты, доля ответов из кэша без обращения к сети,
+        перепроверки, исключения и ответы с кодом не 2xx.
+        """
+        data = self.as_dict()
+        header = (
+            f"{'kind':6} {'name':48} {'count':>7} {'total s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'bytes':>11} "
+            f"{'cache':>6} {'reval':>6} {'errors':>6} {'non-2xx':>7}"
+        )
+        lines = [header, '-' * len(header)]
+        for kind in self.KINDS:
+            for name, row in data[kind].items():
+                count = row.get('count', 0)
+                cache = (
+                    f"{100 * row.get('cache_hits', 0) / count:5.1f}%"
+                    if kind == 'http' and count else ''
+                )
+                lines.append(
+                    f"{kind:6} {name[-48:]:48} {count:7d} "
+                    f"{row.get('seconds', 0):9.3f} "
+                    f"{1000 * row.get('p50', 0):8.1f} "
+                    f"{1000 * row.get('p95', 0):8.1f} "
+                    f"{1000 * row.get('max', 0):8.1f} "
+                    f"{row.get('bytes', 0):11d} {cache:>6} "
+                    f"{row.get('revalidations', 0):6d} "
+                    f"{row.get('errors', 0):6d} "
+                    f"{row.get('bad_status', 0):7d}"
+                )
+        for host, retries in data['retries'].items():
+            lines.append(f'retries {host}: {retries}')
+        return '\n'.join(lines)
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.as_dict(), file, indent=2)
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Сохраняет метрики в формате Prometheus для textfile collector
+        node_exporter. Файл заменяется атомарно.
+        """
+        data = self.as_dict()
+        labels = {'stage': 'stage', 'http': 'endpoint', 'rpc': 'call'}
+        lines = []
+        for kind in self.KINDS:
+            metric = f'{PREFIX}_{kind}_seconds'
+            lines.append(f'# TYPE {metric} histogram')
+            for name, row in data[kind].items():
+                label = f'{labels[kind]}="{name}"'
+                for bound, value in row.get('buckets', {}).items():
+                    lines.append(
+                        f'{metric}_bucket{{{label},le="{bound}"}} {value}'
+                    )
+                lines.append(
+                    f"{metric}_sum{{{label}}} {row.get('seconds', 0)}"
+                )
+                lines.append(
+                    f"{metric}_count{{{label}}} {row.get('count', 0)}"
+                )
+            for counter in ('bytes', 'cache_hits', 'revalidations',
+                            'errors', 'bad_status'):
+                metric = f'{PREFIX}_{kind}_{counter}_total'
+                rows = [
+                    (name, row[counter]) for name, row in data[kind].items()
+                    if counter in row
+                ]
+                if rows:
+                    lines.append(f'# TYPE {metric} counter')
+                for name, value in rows:
+                    lines.append(
+                        f'{metric}{{{labels[kind]}="{name}"}} {value}'
+                    )
+        if data['retries']:
+            lines.append(f'# TYPE {PREFIX}_retries_total counter')
+        for host, value in data['retries'].items():
+            lines.append(f'{PREFIX}_retries_total{{host="{host}"}} {value}')
+
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        os.replace(temporary, path)
+
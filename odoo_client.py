@@ -0,0 +1,235 @@
+import itertools
+import queue
+import threading
+import xmlrpc.client
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from exceptions import OdooRpcError, RetryableError
+from transport import (RETRYABLE_STATUSES, SafeTimeoutTransport,
+                       TimeoutTransport, parse_retry_after)
+
+
+class XmlRpcConnection:
+    """
+    Соединение XML-RPC с Odoo. Транспорт держит одно keep-alive
+    HTTP-соединение, поэтому экземпляр нельзя делить между потоками.
+    """
+
+    def __init__(self, url: str, timeout: float) -> None:
+        self.url = url
+        self.common = xmlrpc.client.ServerProxy(
+            f'{url}/xmlrpc/2/common', transport=self._transport(timeout),
+            allow_none=True,
+        )
+        self.models = xmlrpc.client.ServerProxy(
+            f'{url}/xmlrpc/2/object', transport=self._transport(timeout),
+            allow_none=True,
+        )
+
+    def _transport(self, timeout: float) -> xmlrpc.client.Transport:
+        if self.url.startswith('https'):
+            return SafeTimeoutTransport(timeout)
+        return TimeoutTransport(timeout)
+
+    @staticmethod
+    def _call(method, *args):
+        try:
+            return method(*args)
+        except xmlrpc.client.ProtocolError as error:
+            if error.errcode in RETRYABLE_STATUSES:
+                raise RetryableError(
+                    f'{error.url} {error.errcode} {error.errmsg}',
+                    retry_after=parse_retry_after(
+                        error.headers.get('Retry-After')
+                    ),
+                    status=error.errcode,
+                )
+            raise
+        except xmlrpc.client.Fault as error:
+            raise OdooRpcError(error.faultString)
+
+    def authenticate(self, db, username, password) -> int:
+        return self._call(
+            self.common.authenticate, db, username, password, {}
+        )
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs):
+        return self._call(
+            self.models.execute_kw,
+            db, uid, password, model, method, args, kwargs
+        )
+
+    def close(self) -> None:
+        self.common('close')()
+        self.models('close')()
+
+
+class JsonRpcConnection:
+    """
+    Соединение JSON-RPC с Odoo через эндпоинт /jsonrpc.
+    Base64-изображения передаются строкой JSON без XML-разметки.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url: str, timeout: float) -> None:
+        self.url = f'{url}/jsonrpc'
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=1))
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=1))
+
+    def _call(self, service: str, method: str, *args):
+        response = self.session.post(
+            self.url,
+            json={
+                'jsonrpc': '2.0',
+                'method': 'call',
+                'params': {
+                    'service': service, 'method': method, 'args': args,
+                },
+                'id': next(self._ids),
+            },
+            timeout=self.timeout,
+        )
+        if response.status_code in RETRYABLE_STATUSES:
+            raise RetryableError(
+                f'{self.url} {response.status_code} {response.reason}',
+                retry_after=parse_retry_after(
+                    response.headers.get('Retry-After')
+                ),
+                status=response.status_code,
+            )
+        response.raise_for_status()
+        data = response.json()
+        if data.get('error'):
+            error = data['error']
+            message = error.get('data', {}).get('message') or error.get(
+                'message'
+            )
+            raise OdooRpcError(message)
+        return data['result']
+
+    def authenticate(self, db, username, password) -> int:
+        return self._call('common', 'authenticate', db, username, password, {})
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs):
+        return self._call(
+            'object', 'execute_kw',
+            db, uid, password, model, method, args, kwargs
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+PROTOCOLS = {
+    'xmlrpc': XmlRpcConnection,
+    'jsonrpc': JsonRpcConnection,
+}
+
+
+class OdooPool:
+    """
+    Потокобезопасный пул соединений с Odoo.
+    Каждый поток на время вызова получает собственное keep-alive
+    соединение; аутентификация выполняется один раз на пул.
+    ...
+    Атрибуты
+    --------
+    url : str
+        адрес сервера
+    protocol : str
+        "xmlrpc" или "jsonrpc"
+    size : int
+        максимальное количество соединений
+    timeout : float
+        таймаут одного запроса в секундах
+    Методы
+    ------
+    authenticate():
+        Получает uid пользователя.
+    execute_kw():
+        Вызывает метод модели на свободном соединении.
+    close():
+        Закрывает все соединения.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            protocol: str = 'xmlrpc',
+            size: int = 4,
+            timeout: float = 30.0,
+    ) -> None:
+        if protocol not in PROTOCOLS:
+            raise ValueError(f'Unknown Odoo protocol {protocol}')
+        self.url = url.rstrip('/')
+        self.protocol = protocol
+        self.size = size
+        self.timeout = timeout
+        self.uid: Optional[int] = None
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._all: list = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator:
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = PROTOCOLS[self.protocol](self.url, self.timeout)
+                with self._lock:
+                    self._all.append(conn)
+            try:
+                yield conn
+            except OdooRpcError:
+                self._idle.put(conn)
+                raise
+            except Exception:
+                self._discard(conn)
+                raise
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def _discard(self, conn) -> None:
+        with self._lock:
+            if conn in self._all:
+                self._all.remove(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def authenticate(self, db: str, username: str, password: str) -> int:
+        if self.uid is None:
+            with self.connection() as conn:
+                self.uid = conn.authenticate(db, username, password)
+        return self.uid
+
+    def execute_kw(
+            self, db, uid, password, model, method, args, kwargs=None
+    ):
+        with self.connection() as conn:
+            return conn.execute_kw(
+                db, uid, password, model, method, args, kwargs or {}
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._all = self._all, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
@@ -0,0 +1,63 @@
+from typing import Optional
+
+
+class NameIndex:
+    """
+    Индекс имя -> id для записей модели Odoo.
+    Загружается одним постраничным search_read при первом обращении
+    и дополняется по мере создания новых записей.
+    ...
+    Атрибуты
+    --------
+    odoo_repo : class
+        Экземпляр класса Odoo
+    model : str
+        имя модели Odoo
+    page_size : int
+        количество записей в одном запросе при загрузке
+    Методы
+    ------
+    load():
+        Загружает имена и id всех записей модели.
+    get():
+        Возвращает id записи по имени.
+    add():
+        Добавляет созданную запись в индекс.
+    """
+
+    def __init__(self, odoo_repo, model: str, page_size: int = 1000) -> None:
+        self.odoo_repo = odoo_repo
+        self.model = model
+        self.page_size = page_size
+        self._ids: Optional[dict] = None
+
+    def load(self) -> 'NameIndex':
+        ids: dict = {}
+        for record in self.odoo_repo.search_read_all(
+                self.model, ['name'], page_size=self.page_size
+        ):
+            ids.setdefault(record['name'], record['id'])
+        self._ids = ids
+        return self
+
+    @property
+    def loaded(self) -> bool:
+        return self._ids is not None
+
+    def _loaded(self) -> dict:
+        if self._ids is None:
+            self.load()
+        return self._ids
+
+    def get(self, name: str) -> Optional[int]:
+        return self._loaded().get(name)
+
+    def add(self, name: str, odoo_id: int) -> None:
+        if self._ids is not None:
+            self._ids.setdefault(name, odoo_id)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._loaded()
+
+    def __len__(self) -> int:
+        return len(self._loaded())
@@ -0,0 +1,161 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from main import DataProcessor, PeopleCrawl, close_processor
+from state import StateBuffer, SyncReport
+
+
+def partition(characters_by_planet: dict, shards: int) -> List[dict]:
+    """
+    Делит персонажей на группы по родной планете так, чтобы количество
+    персонажей в группах было примерно одинаковым.
+    ---------
+    characters_by_planet : dict
+        id планеты в SWAPI -> список персонажей
+    shards : int
+        количество групп
+    ---------------------
+    list
+        непустые словари id планеты -> список персонажей
+    """
+    groups: List[Dict[str, list]] = [{} for _ in range(shards)]
+    sizes = [0] * shards
+    for planet_id, characters in sorted(
+            characters_by_planet.items(), key=lambda item: -len(item[1])
+    ):
+        smallest = sizes.index(min(sizes))
+        groups[smallest][planet_id] = characters
+        sizes[smallest] += len(characters)
+    return [group for group in groups if group]
+
+
+def sync_shard(
+        make_processor: Callable[[], DataProcessor],
+        characters_by_planet: dict,
+        planet_ids: dict,
+) -> Tuple[SyncReport, dict]:
+    """
+    Создает и обновляет контакты одной группы планет в отдельном
+    процессе со своими клиентами Swapi и Odoo. Общий файл состояния
+    только читается, изменения возвращаются координатору.
+    ---------
+    make_processor : Callable
+        создает DataProcessor с собственными клиентами
+    characters_by_planet : dict
+        id планеты в SWAPI -> список персонажей группы
+    planet_ids : dict
+        id планеты в SWAPI -> id планеты в Odoo
+    ---------------------
+    tuple
+        (SyncReport, записи состояния из StateBuffer.rows)
+    """
+    processor = make_processor()
+    state = processor.state
+    buffer = StateBuffer(state) if state is not None else None
+    processor.state = buffer
+    try:
+        crawl = PeopleCrawl(characters_by_planet=characters_by_planet)
+        processor.create_characters(
+            processor.plan_characters(crawl, planet_ids)
+        )
+        return processor.report, buffer.rows if buffer is not None else {}
+    finally:
+        close_processor(processor)
+        if state is not None:
+            state.close()
+
+
+class ShardedDataProcessor:
+    """
+    Синхронизация, разделенная между процессами по родным планетам.
+    Координатор обходит people/ и создает планеты, затем группы
+    персонажей синхронизируются в пуле процессов. Каждая планета
+    создается ровно один раз, до записи ее персонажей. В файл
+    состояния пишет только координатор.
+    ...
+    Атрибуты
+    --------
+    make_processor : Callable
+        создает DataProcessor с собственными Swapi и Odoo; вызывается
+        в координаторе и в каждом процессе, поэтому должен сериализоваться
+        pickle (функция модуля или functools.partial)
+    workers : int
+        количество процессов
+    initializer : Callable
+        вызывается при запуске каждого процесса, например для
+        настройки логирования
+    Методы
+    ------
+    process_data():
+        заполнение БД требуемыми данными
+    """
+
+    def __init__(
+            self, make_processor: Callable[[], DataProcessor],
+            workers: int = 4,
+            initializer: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.make_processor = make_processor
+        self.workers = workers
+        self.initializer = initializer
+
+    def process_data(self) -> SyncReport:
+        """
+        заполнение БД требуемыми данными
+        ---------
+        Возвращаемое значение
+        ---------------------
+        SyncReport
+            суммарный отчет координатора и всех процессов
+        """
+        coordinator = self.make_processor()
+        try:
+            crawl = coordinator.swapi.crawl_people()
+            planet_ids = coordinator.sync_planets(crawl.planets)
+            if coordinator.state is not None:
+                coordinator.state.commit()
+            self._sync_shards(coordinator, crawl, planet_ids)
+        finally:
+            close_processor(coordinator)
+
+        logging.info(f'Sync finished: {coordinator.report.summary()}')
+        return coordinator.report
+
+    def _sync_shards(self, coordinator, crawl, planet_ids: dict) -> None:
+        """
+        Запускает шарды и сохраняет их отчеты и состояние. Если шард
+        завершился ошибкой, результаты остальных все равно сохраняются.
+        """
+        shards = partition(crawl.characters_by_planet, self.workers)
+        logging.info(
+            f'Sharded sync: {len(crawl.characters)} characters '
+            f'in {len(shards)} shards'
+        )
+        context = multiprocessing.get_context('spawn')
+        errors = []
+        with ProcessPoolExecutor(
+                max_workers=len(shards) or 1, mp_context=context,
+                initializer=self.initializer,
+        ) as executor:
+            futures = [
+                executor.submit(
+                    sync_shard, self.make_processor, shard,
+                    {planet_id: planet_ids.get(planet_id)
+                     for planet_id in shard},
+                )
+                for shard in shards
+            ]
+            for future in futures:
+                try:
+                    report, rows = future.result()
+                except Exception as error:
+                    logging.error(f'Shard failed: {error}')
+                    errors.append(error)
+                    continue
+                coordinator.report.merge(report)
+                if coordinator.state is not None:
+                    coordinator.state.put_many(rows)
+        if errors:
+            raise errors[0]
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import Counter
+from typing import NamedTuple, Optional
+
+IMAGE_FIELD = 'image_1920'
+
+
+class StateRecord(NamedTuple):
+    """
+    Состояние синхронизированной записи.
+    """
+    odoo_id: int
+    content_hash: str
+    image_hash: Optional[str]
+
+
+class SyncState:
+    """
+    Локальное хранилище состояния инкрементальной синхронизации.
+    Для каждой записи хранит id в Odoo, хэш синхронизированных полей
+    и хэш изображения.
+    ...
+    Атрибуты
+    --------
+    path : str
+        путь к файлу SQLite
+    Методы
+    ------
+    get():
+        Возвращает состояние записи.
+    put():
+        Сохраняет состояние записи.
+    put_many():
+        Сохраняет записи, накопленные StateBuffer.
+    remember():
+        Сохраняет состояние по данным, отправленным в Odoo.
+    record():
+        Состояние записи по данным, отправленным в Odoo.
+    content_hash():
+        Хэш данных записи без изображения.
+    image_hash():
+        Хэш изображения в base64.
+    """
+
+    def __init__(self, path: str = 'sync_state.sqlite') -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, timeout=30.0, check_same_thread=False
+        )
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS synced ('
+            'model TEXT NOT NULL, swapi_id TEXT NOT NULL, '
+            'odoo_id INTEGER NOT NULL, content_hash TEXT NOT NULL, '
+            'image_hash TEXT, PRIMARY KEY (model, swapi_id))'
+        )
+        self._db.commit()
+
+    @staticmethod
+    def content_hash(values: dict) -> str:
+        content = {
+            key: value for key, value in values.items() if key != IMAGE_FIELD
+        }
+        return hashlib.sha256(
+            json.dumps(content, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+    @staticmethod
+    def image_hash(encoded_image: Optional[str]) -> Optional[str]:
+        if encoded_image is None:
+            return None
+        return hashlib.sha256(encoded_image.encode('ascii')).hexdigest()
+
+    def get(self, model: str, swapi_id: str) -> Optional[StateRecord]:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT odoo_id, content_hash, image_hash FROM synced '
+                'WHERE model = ? AND swapi_id = ?', (model, swapi_id)
+            ).fetchone()
+        return StateRecord(*row) if row else None
+
+    def put(
+            self,
+            model: str,
+            swapi_id: str,
+            odoo_id: int,
+            content_hash: str,
+            image_hash: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO synced '
+                '(model, swapi_id, odoo_id, content_hash, image_hash) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (model, swapi_id, odoo_id, content_hash, image_hash)
+            )
+
+    def remember(
+            self,
+            model: str,
+            swapi_id: str,
+            odoo_id: int,
+            values: dict,
+            previous: Optional[StateRecord] = None,
+    ) -> None:
+        """
+        Сохраняет состояние записи по данным, отправленным в Odoo.
+        Если изображение не отправлялось, сохраняется прежний хэш.
+        ---------
+        model : str
+            имя модели Odoo
+        swapi_id : str
+            id записи в SWAPI
+        odoo_id : int
+            id записи в Odoo
+        values : dict
+            данные, отправленные в Odoo
+        previous : StateRecord
+            прежнее состояние записи
+        ---------------------
+        """
+        self.put(model, swapi_id, *self.record(odoo_id, values, previous))
+
+    @classmethod
+    def record(
+            cls,
+            odoo_id: int,
+            values: dict,
+            previous: Optional[StateRecord] = None,
+    ) -> StateRecord:
+        """
+        Состояние записи по данным, отправленным в Odoo.
+        Если изображение не отправлялось, сохраняется прежний хэш.
+        """
+        if IMAGE_FIELD in values:
+            image_hash = cls.image_hash(values[IMAGE_FIELD])
+        else:
+            image_hash = previous.image_hash if previous else None
+        return StateRecord(odoo_id, cls.content_hash(values), image_hash)
+
+    def put_many(self, rows: dict) -> None:
+        """
+        Сохраняет записи, накопленные StateBuffer.
+        ---------
+        rows : dict
+            (модель, id в SWAPI) -> StateRecord
+        ---------------------
+        """
+        for (model, swapi_id), record in rows.items():
+            self.put(model, swapi_id, *record)
+        self.commit()
+
+    def commit(self) -> None:
+        with self._lock:
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+
+class StateBuffer:
+    """
+    Состояние синхронизации для процесса-шарда: читает записи из общего
+    SyncState, а изменения накапливает в памяти. Накопленные записи
+    сохраняет координатор, поэтому шарды не пишут в общий файл.
+    Общее состояние буфер не закрывает.
+    ...
+    Атрибуты
+    --------
+    state : SyncState
+        общее состояние, только для чтения
+    rows : dict
+        (модель, id в SWAPI) -> StateRecord, измененные в шарде
+    """
+
+    content_hash = staticmethod(SyncState.content_hash)
+    image_hash = staticmethod(SyncState.image_hash)
+
+    def __init__(self, state: SyncState) -> None:
+        self.state = state
+        self.rows: dict = {}
+
+    def get(self, model: str, swapi_id: str) -> Optional[StateRecord]:
+        record = self.rows.get((model, swapi_id))
+        return record or self.state.get(model, swapi_id)
+
+    def remember(
+            self,
+            model: str,
+            swapi_id: str,
+            odoo_id: int,
+            values: dict,
+            previous: Optional[StateRecord] = None,
+    ) -> None:
+        self.rows[(model, swapi_id)] = SyncState.record(
+            odoo_id, values, previous
+        )
+
+    def commit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SyncReport:
+    """
+    Счетчики результатов синхронизации по моделям и действиям:
+    created, updated, skipped, failed. Отчет сериализуется pickle,
+    чтобы его можно было вернуть из другого процесса.
+    """
+
+    ACTIONS = ('created', 'updated', 'skipped', 'failed')
+
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {'counts': self.counts}
+
+    def __setstate__(self, state: dict) -> None:
+        self.counts = state['counts']
+        self._lock = threading.Lock()
+
+    def add(self, model: str, action: str, count: int = 1) -> None:
+        with self._lock:
+            self.counts[(model, action)] += count
+
+    def get(self, model: str, action: str) -> int:
+        return self.counts[(model, action)]
+
+    def merge(self, other: 'SyncReport') -> 'SyncReport':
+        with self._lock:
+            self.counts.update(other.counts)
+        return self
+
+    def summary(self) -> str:
+        models = sorted({model for model, _ in self.counts})
+        return '; '.join(
+            f'{model}: ' + ', '.join(
+                f'{action} {self.get(model, action)}'
+                for action in self.ACTIONS
+            )
+            for model in models
+        )
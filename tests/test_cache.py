@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from benchmarks.swapi_stub import SwapiStub
+from cache import HttpCache
+from exceptions import CacheMissError
+from fetcher import Fetcher
+
+
+@pytest.fixture
+def stub():
+    with SwapiStub(latency=0, image_size=1024) as stub:
+        yield stub
+
+
+def make_fetcher(path, **kwargs) -> Fetcher:
+    return Fetcher(cache=HttpCache(str(path), **kwargs))
+
+
+def test_fresh_entry_is_served_from_cache(stub, tmp_path):
+    url = f'{stub.base_url}planets/1/'
+    with make_fetcher(tmp_path) as fetcher:
+        first = fetcher.get(url)
+        second = fetcher.get(url)
+    assert stub.request_count == 1
+    assert not getattr(first, 'from_cache', False)
+    assert second.from_cache
+    assert second.json() == first.json()
+
+
+def test_expired_entry_is_revalidated_with_etag(stub, tmp_path):
+    url = f'{stub.base_url}planets/1/'
+    with make_fetcher(tmp_path, ttl=0) as fetcher:
+        first = fetcher.get(url)
+        second = fetcher.get(url)
+    assert stub.request_count == 2
+    assert second.status_code == 200
+    assert second.revalidated
+    assert second.json() == first.json()
+
+
+def test_expired_entry_is_replaced_when_changed(stub, tmp_path):
+    url = f'{stub.base_url}planets/1/'
+    with make_fetcher(tmp_path, ttl=0) as fetcher:
+        fetcher.get(url)
+        stub.planets['1'] = dict(stub.planets['1'], name='Changed')
+        second = fetcher.get(url)
+        third = fetcher.get(url)
+    assert not getattr(second, 'revalidated', False)
+    assert second.json()['name'] == 'Changed'
+    assert third.revalidated
+    assert third.json()['name'] == 'Changed'
+
+
+def test_not_found_is_cached_until_ttl(stub, tmp_path):
+    url = f'{stub.base_url}planets/999/'
+    with make_fetcher(tmp_path) as fetcher:
+        fetcher.get(url)
+        cached = fetcher.get(url)
+    assert stub.request_count == 1
+    assert cached.status_code == 404
+    assert cached.from_cache
+
+    with make_fetcher(tmp_path, ttl=0) as fetcher:
+        assert fetcher.get(url).status_code == 404
+    assert stub.request_count == 2
+
+
+def test_least_recently_used_entries_are_evicted(stub, tmp_path):
+    urls = [stub.picture_url.format(i) for i in range(1, 4)]
+    with make_fetcher(tmp_path, max_size=2500) as fetcher:
+        fetcher.get(urls[0])
+        fetcher.get(urls[1])
+        fetcher.get(urls[0])
+        fetcher.get(urls[2])
+        assert fetcher.cache.lookup(urls[1]) is None
+        assert fetcher.cache.lookup(urls[0]) is not None
+        assert fetcher.cache.lookup(urls[2]) is not None
+    bodies = [name for name in os.listdir(tmp_path) if name != 'index.sqlite']
+    assert len(bodies) == 2
+
+
+def test_offline_mode_uses_cache_only(stub, tmp_path):
+    url = f'{stub.base_url}planets/1/'
+    with make_fetcher(tmp_path, ttl=0) as fetcher:
+        expected = fetcher.get(url).json()
+    with make_fetcher(tmp_path, ttl=0, offline=True) as fetcher:
+        assert fetcher.get(url).json() == expected
+        with pytest.raises(CacheMissError):
+            fetcher.get(f'{stub.base_url}planets/2/')
+    assert stub.request_count == 1
+
+
+def test_evicted_body_is_fetched_again(stub, tmp_path):
+    url = f'{stub.base_url}planets/1/'
+    with make_fetcher(tmp_path) as fetcher:
+        fetcher.get(url)
+        entry = fetcher.cache.lookup(url)
+        os.remove(os.path.join(tmp_path, entry.key))
+        assert fetcher.cache.to_response(entry) is None
+        response = fetcher.get(url)
+    assert stub.request_count == 2
+    assert response.status_code == 200
+    assert not getattr(response, 'from_cache', False)
@@ -0,0 +1,92 @@
+import functools
+import logging
+
+import pytest
+
+from benchmarks.fake_odoo import FakeOdooDatabase, FakeOdooServer
+from benchmarks.swapi_stub import SwapiStub
+from fetcher import Fetcher
+from main import DataProcessor, Odoo, Swapi
+from sharded import ShardedDataProcessor, partition
+from state import StateBuffer, SyncState
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def make_processor(base_url: str, picture_url: str, odoo_url: str,
+                   state_path: str) -> DataProcessor:
+    logging.disable(logging.CRITICAL)
+    swapi = Swapi(
+        fetcher=Fetcher(), base_url=base_url, picture_url=picture_url
+    )
+    return DataProcessor(
+        swapi, Odoo(url=odoo_url), state=SyncState(state_path)
+    )
+
+
+def test_partition_balances_characters_by_planet():
+    characters_by_planet = {
+        '1': ['a'] * 5, '2': ['b'] * 3, '3': ['c'] * 2, '4': ['d'] * 2,
+    }
+    shards = partition(characters_by_planet, 2)
+    assert [sorted(shard) for shard in shards] == [['1', '4'], ['2', '3']]
+    assert sorted(
+        planet_id for shard in shards for planet_id in shard
+    ) == ['1', '2', '3', '4']
+
+
+def test_partition_drops_empty_shards():
+    assert partition({'1': ['a']}, 4) == [{'1': ['a']}]
+    assert partition({}, 2) == []
+
+
+def test_state_buffer_keeps_shared_state_untouched(tmp_path):
+    state = SyncState(str(tmp_path / 'state.sqlite'))
+    state.remember('res.planet', '1', 10, {'name': 'A'})
+    state.commit()
+
+    buffer = StateBuffer(state)
+    assert buffer.get('res.planet', '1') == state.get('res.planet', '1')
+    buffer.remember('res.planet', '1', 10, {'name': 'B'})
+    buffer.remember('res.planet', '2', 20, {'name': 'C'})
+    assert buffer.get('res.planet', '1').content_hash == (
+        state.content_hash({'name': 'B'})
+    )
+    assert state.get('res.planet', '2') is None
+    buffer.commit()
+    buffer.close()
+
+    state.put_many(buffer.rows)
+    assert state.get('res.planet', '2') == buffer.rows[('res.planet', '2')]
+    state.close()
+
+
+def test_sharded_sync_saves_shard_state_in_coordinator(tmp_path):
+    state_path = str(tmp_path / 'state.sqlite')
+    database = FakeOdooDatabase()
+    with SwapiStub(latency=0, image_size=1024) as stub, \
+            FakeOdooServer(database) as server:
+        factory = functools.partial(
+            make_processor, stub.base_url, stub.picture_url, server.url,
+            state_path,
+        )
+        report = ShardedDataProcessor(factory, workers=2).process_data()
+        assert report.get('res.planet', 'created') == 60
+        assert report.get('res.partner', 'created') == 82
+        assert len(database.tables['res.partner']) == 82
+
+        calls = database.calls
+        report = ShardedDataProcessor(factory, workers=2).process_data()
+        assert report.get('res.planet', 'skipped') == 60
+        assert report.get('res.partner', 'skipped') == 82
+        assert database.calls == calls
+
+    state = SyncState(state_path)
+    assert state.get('res.partner', '1') is not None
+    assert state.get('res.planet', '8') is not None
+    state.close()
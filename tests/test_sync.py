@@ -0,0 +1,201 @@
+import logging
+
+import pytest
+
+from async_etl import AsyncDataProcessor
+from benchmarks.fake_odoo import FakeOdooDatabase
+from benchmarks.swapi_stub import SwapiStub
+from fetcher import Fetcher
+from main import DataProcessor, Odoo, Swapi, close_processor
+from state import IMAGE_FIELD, SyncState
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def stub():
+    with SwapiStub(latency=0, image_size=1024) as stub:
+        yield stub
+
+
+def make_processor(
+        base_url: str, picture_url: str, database, state_path=None,
+        processor_class=DataProcessor, refresh_images: bool = False,
+) -> DataProcessor:
+    swapi = Swapi(
+        fetcher=Fetcher(), base_url=base_url, picture_url=picture_url
+    )
+    state = SyncState(str(state_path)) if state_path else None
+    return processor_class(
+        swapi, Odoo(models=database), state=state,
+        refresh_images=refresh_images,
+    )
+
+
+def sync(stub: SwapiStub, database, state_path=None, **kwargs):
+    processor = make_processor(
+        stub.base_url, stub.picture_url, database, state_path, **kwargs
+    )
+    try:
+        return processor.process_data()
+    finally:
+        close_processor(processor)
+
+
+def records(database: FakeOdooDatabase, model: str) -> dict:
+    return {
+        record['name']: dict(record, id=record_id)
+        for record_id, record in database.tables[model].items()
+    }
+
+
+def test_full_sync_creates_planets_and_contacts(stub):
+    database = FakeOdooDatabase()
+    report = sync(stub, database)
+    assert report.get('res.planet', 'created') == 60
+    assert report.get('res.partner', 'created') == 82
+    planets = records(database, 'res.planet')
+    partner = records(database, 'res.partner')['Character 1']
+    assert planets['Planet 8']['population'] == '8'
+    assert planets['Planet 7']['population'] == '0'
+    assert partner['planet'] == planets['Planet 8']['id']
+    assert partner[IMAGE_FIELD]
+
+
+def test_unchanged_rerun_makes_no_rpc(stub, tmp_path):
+    database = FakeOdooDatabase()
+    state_path = tmp_path / 'state.sqlite'
+    sync(stub, database, state_path)
+    calls = database.calls
+
+    report = sync(stub, database, state_path)
+    assert database.calls == calls
+    assert report.get('res.planet', 'skipped') == 60
+    assert report.get('res.partner', 'skipped') == 82
+    assert report.get('res.partner', 'created') == 0
+    assert report.get('res.partner', 'updated') == 0
+
+
+def test_rerun_updates_changed_planet_and_renamed_character(
+        stub, tmp_path, monkeypatch
+):
+    database = FakeOdooDatabase()
+    state_path = tmp_path / 'state.sqlite'
+    sync(stub, database, state_path)
+    calls = database.calls
+    image = records(database, 'res.partner')['Character 1'][IMAGE_FIELD]
+
+    writes = []
+    execute_kw = database.execute_kw
+
+    def record_writes(db, uid, password, model, method, args, kwargs=None):
+        if method == 'write':
+            writes.append((model, args[1]))
+        return execute_kw(db, uid, password, model, method, args, kwargs)
+
+    monkeypatch.setattr(database, 'execute_kw', record_writes)
+
+    stub.planets['8'] = dict(stub.planets['8'], diameter='1')
+    stub.characters[0]['name'] = 'Renamed 1'
+    report = sync(stub, database, state_path)
+
+    assert database.calls == calls + 2
+    planet = records(database, 'res.planet')['Planet 8']
+    assert sorted(writes, key=lambda write: write[0]) == [
+        ('res.partner', {'name': 'Renamed 1', 'planet': planet['id']}),
+        ('res.planet', DataProcessor.planet_values(stub.planets['8'])),
+    ]
+    assert report.get('res.planet', 'updated') == 1
+    assert report.get('res.planet', 'skipped') == 59
+    assert report.get('res.partner', 'updated') == 1
+    assert report.get('res.partner', 'skipped') == 81
+    assert records(database, 'res.planet')['Planet 8']['diameter'] == '1'
+    partners = records(database, 'res.partner')
+    assert 'Character 1' not in partners
+    assert partners['Renamed 1'][IMAGE_FIELD] == image
+
+    report = sync(stub, database, state_path)
+    assert database.calls == calls + 2
+    assert report.get('res.partner', 'skipped') == 82
+
+
+def test_refresh_images_skips_identical_images(stub, tmp_path):
+    database = FakeOdooDatabase()
+    state_path = tmp_path / 'state.sqlite'
+    sync(stub, database, state_path)
+    calls = database.calls
+
+    report = sync(stub, database, state_path, refresh_images=True)
+    assert database.calls == calls
+    assert report.get('res.partner', 'skipped') == 82
+
+    image = records(database, 'res.partner')['Character 1'][IMAGE_FIELD]
+    stub.image = stub.image[:-2] + b'\x01\xff\xd9'
+    report = sync(stub, database, state_path, refresh_images=True)
+    assert database.calls == calls + 82
+    assert report.get('res.partner', 'updated') == 82
+    images = {
+        partner[IMAGE_FIELD]
+        for partner in database.tables['res.partner'].values()
+    }
+    assert len(images) == 1
+    assert image not in images
+
+
+def test_existing_records_are_adopted_without_creating(stub, tmp_path):
+    database = FakeOdooDatabase()
+    sync(stub, database)
+
+    state_path = tmp_path / 'state.sqlite'
+    report = sync(stub, database, state_path)
+    assert report.get('res.planet', 'created') == 0
+    assert report.get('res.partner', 'created') == 0
+    assert report.get('res.planet', 'skipped') == 60
+    assert report.get('res.partner', 'skipped') == 82
+    assert len(database.tables['res.partner']) == 82
+
+    calls = database.calls
+    sync(stub, database, state_path)
+    assert database.calls == calls
+
+
+def snapshot(database: FakeOdooDatabase) -> tuple:
+    """
+    Содержимое таблиц без учета id: планета контакта заменена именем.
+    """
+    planets = database.tables['res.planet']
+    partners = sorted(
+        (dict(partner, planet=planets[partner['planet']]['name'])
+         for partner in database.tables['res.partner'].values()),
+        key=lambda partner: partner['name'],
+    )
+    return sorted(planets.values(), key=lambda p: p['name']), partners
+
+
+@pytest.mark.parametrize('include_count', [True, False])
+def test_async_sync_matches_sync_path(tmp_path, include_count):
+    databases = {}
+    for processor_class in (DataProcessor, AsyncDataProcessor):
+        database = FakeOdooDatabase()
+        state_path = tmp_path / f'{processor_class.__name__}.sqlite'
+        with SwapiStub(latency=0, image_size=1024,
+                       include_count=include_count) as stub:
+            sync(stub, database, state_path,
+                 processor_class=processor_class)
+            stub.planets['8'] = dict(stub.planets['8'], diameter='1')
+            stub.characters[0]['name'] = 'Renamed 1'
+            report = sync(stub, database, state_path,
+                          processor_class=processor_class)
+        assert report.get('res.planet', 'updated') == 1
+        assert report.get('res.partner', 'updated') == 1
+        databases[processor_class] = database
+
+    expected = snapshot(databases[DataProcessor])
+    assert len(expected[0]) == 60
+    assert len(expected[1]) == 82
+    assert snapshot(databases[AsyncDataProcessor]) == expected
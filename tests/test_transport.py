@@ -0,0 +1,326 @@
+import email.utils
+import logging
+import time
+
+import pytest
+
+from benchmarks.fake_odoo import FakeOdooDatabase, FakeOdooServer
+from benchmarks.swapi_stub import SwapiStub
+from exceptions import (CircuitOpenError, ExceptionStatusError, OdooRpcError,
+                        RetryableError)
+from fetcher import Fetcher
+from main import Odoo, Swapi
+from transport import (CircuitBreaker, TokenBucket, TransportPolicy,
+                       parse_retry_after)
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def fast_policy(**kwargs) -> TransportPolicy:
+    kwargs.setdefault('backoff', 0.001)
+    kwargs.setdefault('max_backoff', 0.01)
+    return TransportPolicy(**kwargs)
+
+
+class Flaky:
+    """
+    Вызов, который падает failures раз, затем возвращает 'ok'.
+    """
+
+    def __init__(self, failures: int, error: Exception = None) -> None:
+        self.failures = failures
+        self.error = error or RetryableError('temporary')
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return 'ok'
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('0.5') == 0.5
+    assert parse_retry_after('-1') == 0.0
+
+
+def test_parse_retry_after_http_date():
+    moment = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 25 <= parse_retry_after(moment) <= 30
+    past = email.utils.formatdate(time.time() - 30, usegmt=True)
+    assert parse_retry_after(past) == 0.0
+
+
+@pytest.mark.parametrize('value', [None, '', 'soon'])
+def test_parse_retry_after_invalid(value):
+    assert parse_retry_after(value) is None
+
+
+def test_token_bucket_allows_burst_then_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=2)
+    started = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+    assert time.monotonic() - started < 0.05
+    bucket.acquire()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.09
+
+
+def test_circuit_breaker_open_half_open_closed():
+    breaker = CircuitBreaker('host', failure_threshold=2, reset_timeout=0.05)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_circuit_breaker_half_open_failure_reopens():
+    breaker = CircuitBreaker('host', failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_circuit_breaker_ignores_throttling():
+    breaker = CircuitBreaker('host', failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_throttled()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_policy_retries_idempotent_call():
+    retried = []
+    policy = fast_policy(
+        retries=3, on_retry=lambda host, error: retried.append(host)
+    )
+    func = Flaky(failures=2)
+    assert policy.call('host', func) == 'ok'
+    assert func.calls == 3
+    assert retried == ['host', 'host']
+
+
+def test_policy_gives_up_after_retries():
+    policy = fast_policy(retries=2)
+    func = Flaky(failures=5)
+    with pytest.raises(RetryableError):
+        policy.call('host', func)
+    assert func.calls == 3
+
+
+def test_policy_does_not_retry_non_idempotent_call():
+    policy = fast_policy(retries=3)
+    func = Flaky(failures=1)
+    with pytest.raises(RetryableError):
+        policy.call('host', func, idempotent=False)
+    assert func.calls == 1
+
+
+def test_policy_retries_only_listed_transport_errors():
+    policy = fast_policy(retries=3)
+    func = Flaky(failures=1, error=ValueError('bad input'))
+    with pytest.raises(ValueError):
+        policy.call('host', func, retry_on=(OSError,))
+    assert func.calls == 1
+    assert policy.breaker('host').state == CircuitBreaker.CLOSED
+
+    func = Flaky(failures=1, error=OSError('reset'))
+    assert policy.call('host', func, retry_on=(OSError,)) == 'ok'
+
+
+def test_policy_honours_retry_after():
+    policy = fast_policy(retries=1, max_backoff=1.0)
+    func = Flaky(failures=1, error=RetryableError('slow', retry_after=0.1))
+    started = time.monotonic()
+    assert policy.call('host', func) == 'ok'
+    assert time.monotonic() - started >= 0.1
+
+
+def test_policy_does_not_trip_breaker_on_throttling():
+    policy = fast_policy(retries=5, failure_threshold=2)
+    func = Flaky(failures=4, error=RetryableError('slow', status=429))
+    assert policy.call('host', func) == 'ok'
+    assert policy.breaker('host').failures == 0
+
+    func = Flaky(failures=2, error=RetryableError('down', status=503))
+    with pytest.raises(CircuitOpenError):
+        policy.call('host', func)
+
+
+class Response:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_policy_closes_superseded_responses():
+    responses = [Response() for _ in range(3)]
+    policy = fast_policy(retries=2)
+    attempts = iter(responses)
+
+    def func():
+        raise RetryableError('down', response=next(attempts), status=503)
+
+    with pytest.raises(RetryableError) as raised:
+        policy.call('host', func)
+    assert [response.closed for response in responses] == [True, True, False]
+    assert raised.value.response is responses[-1]
+
+
+def make_swapi(stub: SwapiStub, policy: TransportPolicy) -> Swapi:
+    return Swapi(
+        fetcher=Fetcher(policy=policy),
+        base_url=stub.base_url,
+        picture_url=stub.picture_url,
+    )
+
+
+def test_swapi_crawl_survives_injected_faults():
+    with SwapiStub(latency=0, error_rate=0.2, throttle_rate=0.1,
+                   retry_after=0.001) as stub:
+        swapi = make_swapi(
+            stub, fast_policy(retries=10, failure_threshold=1000)
+        )
+        with swapi.fetcher:
+            crawl = swapi.crawl_people()
+    assert stub.fault_count > 0
+    assert len(crawl.characters) == 82
+    assert len(crawl.planets) == 60
+
+
+def test_swapi_crawl_waits_out_throttling_with_default_breaker():
+    with SwapiStub(latency=0, throttle_rate=0.5, retry_after=0.01) as stub:
+        swapi = make_swapi(stub, fast_policy(retries=20))
+        with swapi.fetcher:
+            crawl = swapi.crawl_people()
+    assert stub.fault_count > 5
+    assert len(crawl.characters) == 82
+
+
+def test_swapi_reports_error_when_retries_run_out():
+    with SwapiStub(latency=0) as stub:
+        stub.down = True
+        swapi = make_swapi(stub, fast_policy(retries=2))
+        with swapi.fetcher, pytest.raises(ExceptionStatusError):
+            swapi.crawl_people()
+    assert stub.request_count == 3
+
+
+def test_swapi_circuit_breaker_fails_fast():
+    with SwapiStub(latency=0) as stub:
+        stub.down = True
+        swapi = make_swapi(
+            stub, fast_policy(retries=0, failure_threshold=2)
+        )
+        with swapi.fetcher:
+            for _ in range(2):
+                with pytest.raises(ExceptionStatusError):
+                    swapi.get_planet(f'{stub.base_url}planets/1/')
+            with pytest.raises(CircuitOpenError):
+                swapi.get_planet(f'{stub.base_url}planets/1/')
+    assert stub.request_count == 2
+
+
+@pytest.fixture
+def odoo_server():
+    with FakeOdooServer(FakeOdooDatabase()) as server:
+        yield server
+
+
+@pytest.fixture(params=['xmlrpc', 'jsonrpc'])
+def protocol(request):
+    return request.param
+
+
+def make_odoo(server: FakeOdooServer, protocol: str, **kwargs) -> Odoo:
+    return Odoo(
+        url=server.url, protocol=protocol, chunk_size=2,
+        policy=fast_policy(**kwargs),
+    )
+
+
+@pytest.mark.parametrize('status', [429, 502, 503])
+def test_odoo_retries_idempotent_rpc(odoo_server, protocol, status):
+    odoo_repo = make_odoo(odoo_server, protocol, retries=3)
+    odoo_server.faults.extend([status, status])
+    assert odoo_repo.execute('res.planet', 'search', [[]]) == []
+    assert odoo_server.requests == 4
+    odoo_repo.close()
+
+
+def test_odoo_does_not_retry_create(odoo_server, protocol):
+    odoo_repo = make_odoo(odoo_server, protocol, retries=3)
+    odoo_server.faults.append(503)
+    with pytest.raises(RetryableError):
+        odoo_repo.execute('res.planet', 'create', [{'name': 'A'}])
+    assert odoo_server.requests == 2
+    assert odoo_server.database.tables['res.planet'] == {}
+    odoo_repo.close()
+
+
+def test_odoo_server_error_is_not_retried(odoo_server, protocol):
+    odoo_repo = make_odoo(odoo_server, protocol, retries=3)
+    with pytest.raises(OdooRpcError):
+        odoo_repo.execute('res.planet', 'unlink', [[1]])
+    assert odoo_server.requests == 2
+    odoo_repo.close()
+
+
+def test_create_many_falls_back_on_server_error(protocol):
+    database = FakeOdooDatabase(fail_names={'B'})
+    with FakeOdooServer(database) as server:
+        odoo_repo = make_odoo(server, protocol)
+        created = odoo_repo.create_many(
+            'res.planet', {'1': {'name': 'A'}, '2': {'name': 'B'},
+                           '3': {'name': 'C'}}
+        )
+        odoo_repo.close()
+    assert set(created) == {'1', '3'}
+    names = sorted(r['name'] for r in database.tables['res.planet'].values())
+    assert names == ['A', 'C']
+
+
+def test_create_many_does_not_resend_after_timeout(protocol):
+    database = FakeOdooDatabase(latency=0.8)
+    with FakeOdooServer(database) as server:
+        odoo_repo = Odoo(
+            url=server.url, protocol=protocol,
+            policy=fast_policy(timeout=0.5, retries=3),
+        )
+        created = odoo_repo.create_many(
+            'res.planet', {'1': {'name': 'A'}, '2': {'name': 'B'}}
+        )
+        time.sleep(0.5)
+        odoo_repo.close()
+    assert created == {}
+    names = sorted(r['name'] for r in database.tables['res.planet'].values())
+    assert names == ['A', 'B']
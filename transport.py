@@ -0,0 +1,301 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+import xmlrpc.client
+from typing import Callable, Dict, Optional, Tuple
+
+from exceptions import CircuitOpenError, RetryableError
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Разбирает заголовок Retry-After: число секунд или HTTP-дату.
+    ---------
+    Возвращаемое значение
+    ---------------------
+    float или None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов: rate токенов в секунду,
+    не более capacity подряд.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель: после failure_threshold неудач подряд запросы
+    отклоняются сразу в течение reset_timeout секунд, затем
+    пропускается один пробный запрос. Ограничение частоты (429,
+    Retry-After) неудачей не считается.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(
+            self, name: str, failure_threshold: int = 5,
+            reset_timeout: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if (self.state == self.OPEN and time.monotonic()
+                    - self._opened_at >= self.reset_timeout):
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            raise CircuitOpenError(f'Circuit is open for {self.name}')
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_throttled(self) -> None:
+        """
+        Бэкенд ответил, но попросил подождать: счетчик неудач не меняется,
+        пробный запрос после паузы можно повторить.
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if (self.state == self.HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    logging.error(f'Circuit opened for {self.name}')
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+
+class TransportPolicy:
+    """
+    Общая политика обращения к бэкендам Swapi и Odoo.
+    ...
+    Атрибуты
+    --------
+    timeout : float
+        таймаут одного запроса в секундах
+    retries : int
+        количество повторов идемпотентного запроса
+    backoff : float
+        базовая задержка экспоненциального повтора в секундах
+    max_backoff : float
+        максимальная задержка между повторами в секундах
+    rate : float
+        лимит запросов в секунду на хост, None - без ограничения
+    burst : float
+        допустимое количество запросов подряд сверх лимита
+    failure_threshold : int
+        количество неудач подряд, после которого срабатывает предохранитель
+    reset_timeout : float
+        время до пробного запроса после срабатывания предохранителя
+    on_retry : Callable
+        вызывается перед каждым повтором с хостом и ошибкой
+    Методы
+    ------
+    call():
+        Выполняет запрос с ограничением частоты, повторами
+        и предохранителем.
+    """
+
+    def __init__(
+            self,
+            timeout: float = 30.0,
+            retries: int = 3,
+            backoff: float = 0.5,
+            max_backoff: float = 30.0,
+            rate: Optional[float] = None,
+            burst: Optional[float] = None,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30.0,
+            on_retry: Optional[Callable[[str, Exception], None]] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate = rate
+        self.burst = burst
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_retry = on_retry
+
+        self._limiters: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host: str) -> Optional[TokenBucket]:
+        if not self.rate:
+            return None
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = TokenBucket(self.rate, self.burst)
+            return self._limiters[host]
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(
+                    host, self.failure_threshold, self.reset_timeout
+                )
+            return self._breakers[host]
+
+    def delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """
+        Задержка перед повтором: Retry-After, если сервер его прислал,
+        иначе экспоненциальная задержка со случайным разбросом.
+        """
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        ceiling = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    def call(
+            self,
+            host: str,
+            func: Callable,
+            idempotent: bool = True,
+            retry_on: Tuple[type, ...] = (),
+    ):
+        """
+        Выполняет func с учетом политики. Ограничение частоты (429,
+        Retry-After) повторяется без учета в предохранителе; ответ
+        повторяемой попытки закрывается, чтобы вернуть соединение в пул.
+        ---------
+        host : str
+            хост бэкенда, для которого ведутся лимиты и предохранитель
+        func : Callable
+            вызов без аргументов
+        idempotent : bool
+            можно ли повторять вызов
+        retry_on : tuple
+            исключения транспорта, после которых вызов стоит повторить;
+            RetryableError повторяется всегда
+        ---------------------
+        результат func
+        """
+        retry_on = retry_on + (RetryableError,)
+        breaker = self.breaker(host)
+        limiter = self.limiter(host)
+        attempt = 0
+        while True:
+            breaker.before_call()
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                result = func()
+            except retry_on as error:
+                if getattr(error, 'throttled', False):
+                    breaker.record_throttled()
+                else:
+                    breaker.record_failure()
+                if not idempotent or attempt >= self.retries:
+                    raise
+                response = getattr(error, 'response', None)
+                if response is not None:
+                    response.close()
+                delay = self.delay(
+                    attempt, getattr(error, 'retry_after', None)
+                )
+                logging.warning(
+                    f'Retrying {host} in {delay:.2f}s '
+                    f'(attempt {attempt + 1}), {error}'
+                )
+                if self.on_retry is not None:
+                    self.on_retry(host, error)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                breaker.record_success()
+                raise
+            breaker.record_success()
+            return result
+
+
+class TimeoutTransport(xmlrpc.client.Transport):
+    """
+    Транспорт XML-RPC с таймаутом соединения.
+    """
+
+    def __init__(self, timeout: float, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class SafeTimeoutTransport(xmlrpc.client.SafeTransport):
+    """
+    Транспорт XML-RPC по HTTPS с таймаутом соединения.
+    """
+
+    def __init__(self, timeout: float, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection